@@ -4,16 +4,45 @@ import time
 import random
 import os
 import json
-from openai import OpenAI
+import logging
+import asyncio
+import threading
+from collections import Counter
+import numpy as np
 from idea_maze import IdeaMaze, Direction
+from replay_log import ReplayWriter
+from episode_dataset import new_episode_id, shared_writer
+from video_export import VideoRecorder
+from headless_maze import WIN_REWARD, DIRECTION_DELTAS, MACRO_ACTIONS, HeadlessMaze, macro_primitives
+from profiling import NULL_PROFILER, StepProfiler
+from policy_router import obvious_action
+from circuit_breaker import FALLBACKS, random_fallback
+from llm_backends import OpenAIBackend, backend_from_env, message_tokens
+
+# Prompts, replies and API errors; set LOG_LEVEL=DEBUG to see every prompt
+logger = logging.getLogger(__name__)
+
+# The game rules for the system prompt, found next to this file whatever the working directory
+README_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "README.md")
+
+# How macro actions are explained to the model
+MACRO_DESCRIPTIONS = {
+    "build_until_blocked": "keep building forward until the next cell is a wall or the edge, "
+                           "or new cells come into view (1 month per build)",
+    "pivot_to_up": "pivot until facing UP (1 month per pivot)",
+    "pivot_to_right": "pivot until facing RIGHT (1 month per pivot)",
+    "pivot_to_down": "pivot until facing DOWN (1 month per pivot)",
+    "pivot_to_left": "pivot until facing LEFT (1 month per pivot)",
+    "talk_then_build": "talk to users, then build (2 months)",
+}
 
 class DumbPlayer:
     """
     A player that makes random moves without any strategy
     """
-    def __init__(self):
-        # Create the game instance
-        self.game = IdeaMaze()
+    def __init__(self, layout=None):
+        # Create the game instance, on a prepared layout if given (see maze_corpus.py)
+        self.game = IdeaMaze(layout=layout)
         # Disable debug mode to simulate player view
         self.game.debug_mode = False
         # Set AI mode to disable user button clicks
@@ -27,6 +56,78 @@ class DumbPlayer:
         self.action_history = []
         # Current action being performed (for UI highlighting)
         self.current_action = None
+        # Replay recorder, set by start_replay
+        self.replay_writer = None
+        # Transition dataset writer shared by the process's games and this game's episode id, set by start_dataset
+        self.transition_writer = None
+        self.episode_id = None
+        # Video recorder, set by start_video
+        self.video_recorder = None
+        # Seconds spent choosing the last action, if the player measures it
+        self.last_latency = None
+        # Per-phase step timings, set by start_profiling
+        self.profiler = NULL_PROFILER
+    
+    def close(self):
+        """
+        Release what the player holds for choosing actions; called once the game has ended
+        """
+    
+    def start_profiling(self, *sinks):
+        """
+        Time every phase of each step (see profiling.py) and send the timings to sinks
+        """
+        self.profiler = StepProfiler(sinks)
+    
+    def stop_profiling(self):
+        """
+        Close the profiling sinks
+        """
+        self.profiler.close()
+        self.profiler = NULL_PROFILER
+    
+    def start_replay(self, path, **kwargs):
+        """
+        Record every executed action to the replay archive at path
+        """
+        self.replay_writer = ReplayWriter.from_game(path, self.game, **kwargs)
+    
+    def stop_replay(self):
+        """
+        Write the recorded game to the replay archive
+        """
+        if self.replay_writer is not None:
+            self.replay_writer.close()
+            self.replay_writer = None
+    
+    def start_dataset(self, directory, **kwargs):
+        """
+        Stream every executed action as a transition into NPZ shards in directory,
+        through the writer all games in this process share (see episode_dataset.shared_writer)
+        """
+        self.transition_writer = shared_writer(directory, **kwargs)
+        self.episode_id = new_episode_id()
+    
+    def stop_dataset(self):
+        """
+        Stop recording transitions. The shared writer writes its last shard when the process exits.
+        """
+        self.transition_writer = None
+    
+    def start_video(self, path, **kwargs):
+        """
+        Record the game to a video file (see video_export.VideoRecorder), starting with the current state
+        """
+        self.video_recorder = VideoRecorder(path, **kwargs)
+        self.video_recorder.capture(self.game)
+    
+    def stop_video(self):
+        """
+        Finish writing the video
+        """
+        if self.video_recorder is not None:
+            self.video_recorder.close(self.game)
+            self.video_recorder = None
     
     def get_visible_map(self):
         """
@@ -51,6 +152,13 @@ class DumbPlayer:
             visible_map.append(row)
         return visible_map
     
+    def get_visible_array(self):
+        """
+        Same as get_visible_map but as an int8 numpy array.
+        Visible cells are always marked visited, so the visited mask is enough.
+        """
+        return np.where(self.game.visited_cells, self.game.player_maze, -1).astype(np.int8)
+    
     def get_game_state(self):
         """
         Get the current state of the game for the AI to make decisions
@@ -73,36 +181,90 @@ class DumbPlayer:
         self.current_action = action
         return action
     
+    def front_is_open(self):
+        """
+        Whether the founder can build into the cell it faces (always a visible cell)
+        """
+        founder = self.game.founder
+        dx, dy = DIRECTION_DELTAS[founder.direction.value]
+        x, y = founder.x + dx, founder.y + dy
+        maze = self.game.debug_maze
+        return 0 <= x < maze.shape[1] and 0 <= y < maze.shape[0] and maze[y][x] != 1
+    
     def execute_action(self, action):
         """
         Execute the chosen action in the game
         """
+        # Macro actions run their primitive actions one by one, each recorded as usual
+        if action in MACRO_ACTIONS:
+            for primitive in macro_primitives(
+                    action, lambda: self.game.founder.direction.value, self.front_is_open,
+                    lambda: int(self.game.visited_cells.sum()),
+                    lambda: self.game.game_won or self.game.game_over):
+                self.execute_action(primitive)
+            self.current_action = action
+            return
+        
         # Add to action history
         self.action_history.append(action)
         # Set current action for UI highlighting
         self.current_action = action
         
-        if action == "pivot":
-            self.game.founder.pivot()
-            self.game.runway -= 1
-        elif action == "build":
-            self.game.founder.build(self.game.debug_maze)
-            self.game.check_win()
-            self.game.runway -= 1
-            # Update visited cells after the move
-            self.game.update_visited_cells()
-        elif action == "talk_to_user":
-            self.game.founder.talk_to_user()
-            self.game.runway -= 1
-            # Update visited cells after increasing visibility
-            self.game.update_visited_cells()
-        elif action == "fundraise":
-            self.game.founder.fundraise()
-            self.game.runway -= 1
-        
-        # Check if out of runway
-        if self.game.runway <= 0:
-            self.game.game_over = True
+        # State before the action, for the transition dataset
+        if self.transition_writer is not None:
+            observation = self.get_visible_array()
+            position = (self.game.founder.x, self.game.founder.y)
+            direction = self.game.founder.direction
+            temporary_boost = self.game.founder.temporary_boost
+            runway = self.game.runway
+            was_won = self.game.game_won
+        
+        with self.profiler.phase("execute_action"):
+            if action == "pivot":
+                self.game.founder.pivot()
+                self.game.runway -= 1
+            elif action == "build":
+                self.game.founder.build(self.game.debug_maze)
+                self.game.check_win()
+                self.game.runway -= 1
+                # Update visited cells after the move
+                with self.profiler.phase("visibility"):
+                    self.game.update_visited_cells()
+            elif action == "talk_to_user":
+                self.game.founder.talk_to_user()
+                self.game.runway -= 1
+                # Update visited cells after increasing visibility
+                with self.profiler.phase("visibility"):
+                    self.game.update_visited_cells()
+            elif action == "fundraise":
+                self.game.founder.fundraise()
+                self.game.runway -= 1
+            
+            # Check if out of runway
+            if self.game.runway <= 0:
+                self.game.game_over = True
+        
+        # Record the action and save the replay once the game has ended
+        if self.replay_writer is not None:
+            self.replay_writer.record(action, self.game.founder, self.last_latency)
+            if self.game.game_won or self.game.game_over:
+                self.stop_replay()
+        
+        if self.video_recorder is not None:
+            self.video_recorder.capture(self.game)
+            if self.game.game_won or self.game.game_over:
+                self.stop_video()
+        
+        if self.transition_writer is not None:
+            done = self.game.game_won or self.game.game_over
+            reward = WIN_REWARD if self.game.game_won and not was_won else 0.0
+            self.transition_writer.add(observation, action, runway, position, direction,
+                                       temporary_boost, reward, done, self.episode_id)
+            if done:
+                self.stop_dataset()
+        
+        if self.game.game_won or self.game.game_over:
+            self.close()
     
     def draw_buttons(self, screen, font):
         """
@@ -178,6 +340,7 @@ class DumbPlayer:
             clock = pygame.time.Clock()
             last_action_time = 0
             player_label = getattr(self, 'player_label', "DumbPlayer")
+            profiler = self.profiler
             
             while running:
                 current_time = time.time()
@@ -185,9 +348,17 @@ class DumbPlayer:
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         running = False
+                        # Keep the unfinished game in the replay archive and dataset
+                        self.stop_replay()
+                        self.stop_dataset()
+                        self.stop_video()
+                        self.stop_profiling()
                         pygame.quit()
                         sys.exit()
                 
+                # Frame drawing time, only measured when profiling
+                render_start = time.perf_counter() if profiler.enabled else 0.0
+                
                 # Clear the screen
                 self_game.screen.fill((255, 255, 255))
                 
@@ -284,18 +455,26 @@ class DumbPlayer:
                         self_game.screen.get_height() // 2 - game_over_text.get_height() // 2
                     ))
                 
-                pygame.display.flip()
+                if profiler.enabled:
+                    profiler.record("render", time.perf_counter() - render_start)
+                
+                with profiler.phase("flip"):
+                    pygame.display.flip()
                 clock.tick(60)
                 
                 # If not game over or won, let the AI make a move after the delay time has passed
                 if (not self_game.game_won and not self_game.game_over and 
                     current_time - last_action_time >= self.move_delay):
                     # Get current game state
-                    game_state = self.get_game_state()
+                    with profiler.phase("observation"):
+                        game_state = self.get_game_state()
                     # Let AI choose an action
-                    action = self.choose_action(game_state)
+                    with profiler.phase("decision"):
+                        action = self.choose_action(game_state)
                     # Execute the action
                     self.execute_action(action)
+                    # Frames drawn since the last move count towards this step
+                    profiler.end_step()
                     # Record the time this action was taken
                     last_action_time = time.time()
             
@@ -313,34 +492,180 @@ class AIPlayer(DumbPlayer):
     """
     A player that uses OpenAI to make intelligent moves based on the game state
     """
-    def __init__(self):
-        super().__init__()
+    # Whether the next request can be predicted from the game state (see start_prefetch)
+    can_prefetch = True
+    
+    def __init__(self, layout=None, macro_actions=True, structured_output=True, router=False,
+                 ensemble=1, ensemble_temperature=0.8, quorum=None, prefetch=False, prefetch_limit=None,
+                 backend=None):
+        super().__init__(layout)
+        
+        # Offer the model macro actions as well as the four basic ones
+        self.macro_actions = macro_actions
+        # Constrain replies to a JSON schema with the action names as an enum,
+        # instead of free text (for servers without structured output support)
+        self.structured_output = structured_output
+        # We only need a few tokens for the action: {"action":"build_until_blocked"} is 7
+        self.max_tokens = 12 if structured_output else 10
+        # Lower temperature for more consistent responses
+        self.temperature = 0.2
+        # How replies were parsed: valid, repaired (a valid action found in a reply
+        # that didn't follow the format), invalid (random action played) and API errors
+        self.response_stats = {"valid": 0, "repaired": 0, "invalid": 0, "errors": 0}
+        # Play states with an obvious move by rule (see policy_router.py) and only
+        # ask the model about the rest; router_stats counts decisions by rule
+        self.router = router
+        self.router_stats = {"pmf_path": 0, "one_way_out": 0, "escalated": 0}
+        # With ensemble > 1, send that many requests at once at ensemble_temperature and
+        # play the action a quorum of them agree on (a majority by default), cancelling
+        # the rest. ensemble_stats tracks how often and how much they agree, counting
+        # only votes whose reply was played. Each request ends up as a reply, failed,
+        # unused (it arrived after the vote was decided) or abandoned (cancelled).
+        self.ensemble = ensemble
+        self.ensemble_temperature = ensemble_temperature
+        self.quorum = quorum or ensemble // 2 + 1
+        self.ensemble_stats = {"decisions": 0, "requests": 0, "replies": 0, "failed": 0, "unused": 0,
+                               "abandoned": 0, "quorum_reached": 0, "unanimous": 0, "winning_votes": 0}
+        # With prefetch, send the request for each state the chosen action can lead to
+        # while it is played and drawn, and use the reply if that state is reached.
+        # At most prefetch_limit requests (an ensemble counts as ensemble requests)
+        # are sent per move; by default enough for every pivot outcome, or one ensemble.
+        if prefetch and not self.can_prefetch:
+            logger.warning("%s can't prefetch requests, prefetching is off", type(self).__name__)
+        self.prefetch = prefetch and self.can_prefetch
+        self.prefetch_limit = prefetch_limit if prefetch_limit is not None else max(3, ensemble)
+        # (messages, future, time sent) for each predicted state
+        self.prefetched = []
+        # over_limit counts predicted states left out because of prefetch_limit
+        self.prefetch_stats = {"requests": 0, "hits": 0, "misses": 0, "over_limit": 0}
+        # Event loop on its own thread for ensemble and prefetched requests (see submit),
+        # so that requests no longer needed can be cancelled even while in flight
+        self.loop = None
+        self.loop_thread = None
+        if self.ensemble > 1 or self.prefetch:
+            self.loop = asyncio.new_event_loop()
+            self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self.loop_thread.start()
+        # Rate limit shared with other games, set by share_rate_limit
+        self.scheduler = None
+        # Recorded responses, set by use_cassette
+        self.cassette = None
+        # Local policy for moves the model can't make: fallback(player, game_state) -> action.
+        # With a circuit breaker (see set_circuit_breaker) it also plays every move while
+        # the API is considered down, counted in degraded_steps.
+        self.fallback = random_fallback
+        self.breaker = None
+        self.degraded_steps = 0
         
-        # OpenAI client
-        self.client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+        # Where requests go (see llm_backends.py), the OpenAI API by default
+        self.backend = backend if backend is not None else OpenAIBackend()
         
         # Load README content for system prompt
-        with open("README.md", "r") as f:
+        with open(README_PATH, "r") as f:
             self.readme_content = f.read()
         
+        # Built on first use by system_prompt
+        self._system_prompt = None
+        
         # Set a more descriptive UI label
         self.player_label = "OpenAI Player"
     
-    def choose_action(self, game_state):
+    def prompt_actions(self):
         """
-        Choose an action based on OpenAI's recommendation
+        Actions the model may choose from
+        """
+        return self.actions + MACRO_ACTIONS if self.macro_actions else list(self.actions)
+    
+    def response_instructions(self):
+        """
+        End of the system prompt, saying what to reply with
+        """
+        actions = self.prompt_actions()
+        action_names = ", ".join(f'"{action}"' for action in actions[:-1]) + f', or "{actions[-1]}"'
+        if self.structured_output:
+            return f"""You must respond with a JSON object such as {{"action": "build"}}, where "action" is exactly one of these actions: {action_names}."""
+        return f"""You must respond with exactly one of these actions: {action_names}.
+Do not include any explanation, just the action name."""
+    
+    def choice_instructions(self):
+        """
+        End of the user prompt, asking for the next move
+        """
+        if self.structured_output:
+            return "Choose one action from the list above."
+        return "Choose one action from the list above. Respond with only the action name."
+    
+    def response_format(self):
+        """
+        JSON schema the reply must follow when structured_output is set
+        """
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "action",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {"action": {"type": "string", "enum": self.prompt_actions()}},
+                    "required": ["action"],
+                    "additionalProperties": False,
+                },
+            },
+        }
+    
+    def system_prompt(self):
+        """
+        System prompt with the game rules, built once from the README
+        """
+        if self._system_prompt is None:
+            # Extract only specific sections from the README for the system prompt
+            readme_sections = self.extract_readme_sections([
+                "Game Elements", 
+                "Controls", 
+                "Visibility and Fog of War", 
+                "Win/Lose Conditions"
+            ])
+            
+            # System prompt uses only the specified README sections
+            self._system_prompt = f"""
+You are playing "The Idea Maze" game. Your goal is to navigate the Founder to the PMF square.
+
+Here are the relevant game rules:
+
+{readme_sections}
+
+{self.response_instructions()}
+"""
+        return self._system_prompt
+    
+    def describe_map(self, game_state):
+        """
+        The map section of the user prompt
         """
         # Create a string representation of the visible map
         map_str = self.map_to_string(game_state["visible_map"], game_state["founder_position"])
+        return f"""Visible Map (? = unexplored, # = wall, . = empty space, P = PMF, F = Founder's position):
+{map_str}"""
+    
+    def user_prompt(self, game_state, action_history=None):
+        """
+        User prompt with the game state and action history (the player's own by default)
+        """
+        if action_history is None:
+            action_history = self.action_history
         
         # Format the action history
         action_history = "\n".join([f"- {i+1}. {action.replace('_', ' ').title()}" 
-                                     for i, action in enumerate(self.action_history)])
+                                     for i, action in enumerate(action_history)])
         if not action_history:
             action_history = "No actions taken yet."
         
-        # Create a user prompt with the game state and action history
-        user_prompt = f"""
+        # Numbered list of actions, with what each macro action does
+        action_list = "\n".join(
+            f"{i}. {action}" + (f" - {MACRO_DESCRIPTIONS[action]}" if action in MACRO_DESCRIPTIONS else "")
+            for i, action in enumerate(self.prompt_actions(), 1))
+        
+        return f"""
 Current Game State:
 - Position: ({game_state['founder_position'][0]}, {game_state['founder_position'][1]})
 - Direction: {game_state['founder_direction']}
@@ -348,86 +673,495 @@ Current Game State:
 - Runway: {game_state['runway']} months
 - Temporary visibility boost: {'Yes' if game_state['temporary_boost'] else 'No'}
 
-Visible Map (? = unexplored, # = wall, . = empty space, P = PMF, F = Founder's position):
-{map_str}
+{self.describe_map(game_state)}
 
 Action History:
 {action_history}
 
 Based on the current game state, choose your next action:
-1. pivot
-2. build
-3. talk_to_user
-4. fundraise
+{action_list}
 
-Choose one action from the list above. Respond with only the action name.
+{self.choice_instructions()}
 """
-
-        # Extract only specific sections from the README for the system prompt
-        readme_sections = self.extract_readme_sections([
-            "Game Elements", 
-            "Controls", 
-            "Visibility and Fog of War", 
-            "Win/Lose Conditions"
-        ])
-
-        # System prompt uses only the specified README sections
-        system_prompt = f"""
-You are playing "The Idea Maze" game. Your goal is to navigate the Founder to the PMF square.
-
-Here are the relevant game rules:
-
-{readme_sections}
-
-You must respond with exactly one of these actions: "pivot", "build", "talk_to_user", or "fundraise".
-Do not include any explanation, just the action name.
-"""
-
+    
+    def build_messages(self, game_state, action_history=None):
+        """
+        Chat messages for one decision
+        """
+        return [
+            {"role": "system", "content": self.system_prompt()},
+            {"role": "user", "content": self.user_prompt(game_state, action_history)},
+        ]
+    
+    def completion_request(self, messages, temperature=None):
+        """
+        Chat completion arguments for sending messages
+        """
+        request = {
+            "model": self.backend.model,
+            "messages": messages,
+            "temperature": self.temperature if temperature is None else temperature,
+            "max_tokens": self.max_tokens,
+        }
+        if self.structured_output:
+            request["response_format"] = self.response_format()
+        return request
+    
+    def request_completion(self, messages, temperature=None):
+        """
+        Send messages to OpenAI and return the reply text and the seconds it
+        waited for the shared rate limit (see share_rate_limit) before it was sent
+        """
+        request = self.completion_request(messages, temperature)
+        
+        def send():
+            return self.backend.create(**request)
+        
+        if self.scheduler is not None:
+            response, queued = self.scheduler.call(id(self), send, self.estimate_tokens(messages))
+        else:
+            response, queued = send(), 0.0
+        return response.choices[0].message.content, queued
+    
+    async def arequest_completion(self, messages, temperature=None):
+        """
+        request_completion for asyncio code, sent with the backend's acreate
+        """
+        request = self.completion_request(messages, temperature)
+        
+        async def send():
+            return await self.backend.acreate(**request)
+        
+        if self.scheduler is not None:
+            response, queued = await self.scheduler.acall(id(self), send, self.estimate_tokens(messages))
+        else:
+            response, queued = await send(), 0.0
+        return response.choices[0].message.content, queued
+    
+    def share_rate_limit(self, scheduler):
+        """
+        Send requests through a rate_limit.RateLimitScheduler shared with other games.
+        The scheduler retries rate-limited requests itself, so the client doesn't.
+        """
+        self.scheduler = scheduler
+        self.backend = self.backend.with_options(max_retries=0)
+    
+    def set_circuit_breaker(self, breaker, fallback="explore", timeout=None):
+        """
+        Stop calling the API while breaker (a circuit_breaker.CircuitBreaker) is
+        open and play fallback instead: a name from circuit_breaker.FALLBACKS or a
+        callable. timeout limits how long each request may take, in seconds.
+        """
+        self.breaker = breaker
+        self.fallback = FALLBACKS[fallback] if isinstance(fallback, str) else fallback
+        if timeout is not None:
+            self.backend = self.backend.with_options(timeout=timeout)
+    
+    def use_cassette(self, path, mode="auto", simulate_latency=False):
+        """
+        Serve requests from the cassette file at path and record new ones (see cassette.py).
+        mode is "record", "replay" (no API calls at all) or "auto" (replay what is recorded).
+        """
+        from cassette import Cassette, CassetteBackend
+        self.cassette = Cassette(path, mode, simulate_latency)
+        self.backend = CassetteBackend(self.backend, self.cassette)
+    
+    def estimate_tokens(self, messages):
+        """
+        Rough token cost of a request, including the longest reply
+        """
+        return message_tokens(messages) + self.max_tokens
+    
+    def count_response(self, kind, action):
+        """
+        Count a parsed reply in response_stats and return its action
+        """
+        self.response_stats[kind] += 1
+        return action
+    
+    def invalid_response_rate(self):
+        """
+        Fraction of replies that didn't follow the response format (repaired or invalid)
+        """
+        replies = self.response_stats["valid"] + self.response_stats["repaired"] + self.response_stats["invalid"]
+        if replies == 0:
+            return 0.0
+        return (self.response_stats["repaired"] + self.response_stats["invalid"]) / replies
+    
+    def read_action(self, action_text):
+        """
+        The action in the model's reply and whether it was "valid", "repaired"
+        (found in a reply that didn't follow the format) or "invalid" (action is None)
+        """
+        action_text = (action_text or "").strip()
+        
+        # Direct matching with valid actions, macro actions first since their names contain basic ones
+        valid_actions = ["pivot", "build", "talk_to_user", "fundraise"]
+        if self.macro_actions:
+            valid_actions = MACRO_ACTIONS + valid_actions
+        
+        if self.structured_output:
+            try:
+                action = json.loads(action_text)["action"]
+            except (ValueError, KeyError, TypeError):
+                action = None
+            if action in valid_actions:
+                return action, "valid"
+        
+        action_text = action_text.lower()
+        
+        # Try exact match first
+        if not self.structured_output and action_text in valid_actions:
+            return action_text, "valid"
+            
+        # Try to extract valid action if the response includes extra text
+        for valid_action in valid_actions:
+            if valid_action in action_text:
+                return valid_action, "repaired"
+        
+        return None, "invalid"
+    
+    def parse_action(self, action_text):
+        """
+        Turn the model's reply into a valid action
+        """
+        action, kind = self.read_action(action_text)
+        if kind == "repaired":
+            # Log that we had to clean up the response
+            logger.info("Cleaned up OpenAI response from '%s' to '%s'", action_text, action)
+        elif kind == "invalid":
+            # If no valid action found, default to a random action
+            logger.warning("OpenAI returned invalid action: '%s', using random action instead", action_text)
+            action = random.choice(self.actions)
+        return self.count_response(kind, action)
+    
+    def vote_key(self, action_text):
+        """
+        What a reply votes for in an ensemble, or None if it can't be read
+        """
+        return self.read_action(action_text)[0]
+    
+    async def request_votes(self, messages):
+        """
+        Send ensemble requests at once and return a reply from the first group
+        of quorum replies that vote the same way, cancelling the other
+        requests. Without a quorum the most common vote wins (the first reply
+        on a tie); if no reply could be read, the last reply is returned and
+        parsed as usual. Also returns the rate limit wait of the last reply
+        the vote waited for, and the vote's counts for ensemble_stats (see
+        count_votes).
+        """
+        tasks = [asyncio.ensure_future(self.arequest_completion(messages, self.ensemble_temperature))
+                 for _ in range(self.ensemble)]
+        tally = {"decisions": 1, "requests": self.ensemble, "replies": 0, "failed": 0, "unused": 0,
+                 "abandoned": 0, "quorum_reached": 0, "unanimous": 0, "winning_votes": 0}
+        votes = Counter()
+        first_reply = {}
+        action_text = None
+        queued = 0.0
+        error = None
+        try:
+            for next_reply in asyncio.as_completed(tasks):
+                try:
+                    action_text, queued = await next_reply
+                except Exception as e:
+                    error = e
+                    tally["failed"] += 1
+                    continue
+                tally["replies"] += 1
+                key = self.vote_key(action_text)
+                if key is None:
+                    continue
+                votes[key] += 1
+                first_reply.setdefault(key, action_text)
+                if votes[key] >= self.quorum:
+                    tally["quorum_reached"] = 1
+                    break
+        finally:
+            # Cancel the requests still waiting or in flight, so they don't hold on to connections.
+            # Ones that finished after the deciding reply didn't take part in the vote.
+            finished = 0
+            for task in tasks:
+                if task.done():
+                    finished += 1
+                    if not task.cancelled():
+                        task.exception()  # retrieved, so asyncio doesn't warn about an unused failure
+                else:
+                    task.cancel()
+                    tally["abandoned"] += 1
+            tally["unused"] = finished - tally["replies"] - tally["failed"]
+        
+        if not votes:
+            if action_text is None:
+                raise error
+            return action_text, queued, tally
+        winner, count = votes.most_common(1)[0]
+        tally["winning_votes"] = count
+        tally["unanimous"] = int(count == tally["replies"])
+        logger.debug("Ensemble votes: %s", dict(votes))
+        return first_reply[winner], queued, tally
+    
+    def count_votes(self, tally):
+        """
+        Add an ensemble vote's counts (or None) to ensemble_stats, once its reply is played
+        """
+        if tally is not None:
+            for key, value in tally.items():
+                self.ensemble_stats[key] += value
+    
+    def submit(self, coroutine):
+        """
+        Run coroutine on the player's event loop, returning a concurrent.futures.Future.
+        Cancelling the future cancels the coroutine, even while a request is in flight.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+    
+    def close(self):
+        """
+        Cancel the requests still running and stop the event loop
+        """
+        if self.loop is None:
+            return
+        
+        async def cancel_requests():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        self.submit(cancel_requests()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.loop.close()
+        self.loop = None
+    
+    def reply_with_votes(self, messages):
+        """
+        Reply text for messages, its rate limit wait and the ensemble vote's
+        counts (None for a single request), without counting them yet
+        """
+        if self.ensemble > 1:
+            return self.submit(self.request_votes(messages)).result()
+        return (*self.request_completion(messages), None)
+    
+    async def areply_with_votes(self, messages):
+        """
+        reply_with_votes for asyncio code
+        """
+        if self.ensemble > 1:
+            return await self.request_votes(messages)
+        return (*await self.arequest_completion(messages), None)
+    
+    def fetch_reply(self, messages):
+        """
+        Reply text for messages, from one request or an ensemble vote, and
+        the seconds it waited for the shared rate limit
+        """
+        action_text, queued, tally = self.reply_with_votes(messages)
+        self.count_votes(tally)
+        return action_text, queued
+    
+    def predict_states(self, action):
+        """
+        Yield (game_state, action_history) for each state the action can lead
+        to: one for most actions and one per new direction for pivot. Macro
+        actions that pivot take a random number of months and aren't predicted.
+        Finished games are skipped, since they need no further decision.
+        """
+        if action.startswith("pivot_to_"):
+            return
+        sim = HeadlessMaze.from_game(self.game)
+        if action == "pivot":
+            outcomes = []
+            for turn in (1, 2, 3):
+                outcome = sim.copy()
+                outcome.step("pivot")
+                outcome.direction = (sim.direction + turn) % 4
+                outcomes.append((outcome, self.action_history + ["pivot"]))
+        else:
+            history = list(self.action_history)
+            primitives = macro_primitives(action, lambda: sim.direction, sim.front_is_open,
+                                          lambda: int(sim.visited_cells.sum()), lambda: sim.done) \
+                if action in MACRO_ACTIONS else [action]
+            for primitive in primitives:
+                sim.step(primitive)
+                history.append(primitive)
+            outcomes = [(sim, history)]
+        
+        for outcome, history in outcomes:
+            if outcome.done:
+                continue
+            game_state = {
+                "visible_map": outcome.get_visible_map().tolist(),
+                "founder_position": (outcome.x, outcome.y),
+                "founder_direction": Direction(outcome.direction).name,
+                "visibility": outcome.visibility,
+                "runway": outcome.runway,
+                "temporary_boost": outcome.temporary_boost > 0
+            }
+            yield game_state, history
+    
+    def start_prefetch(self, action):
+        """
+        Send the requests for the states action may lead to, in the background,
+        skipping states the router would play without the model, up to prefetch_limit requests
+        """
+        # Predictions from earlier moves that were never asked for (after a routed move) are stale
+        self.take_prefetched(None)
+        if self.breaker is not None and self.breaker.state != self.breaker.CLOSED:
+            return
+        for game_state, history in self.predict_states(action):
+            if self.router and obvious_action(np.array(game_state["visible_map"]), game_state["founder_position"],
+                                              Direction[game_state["founder_direction"]],
+                                              self.macro_actions) is not None:
+                continue
+            if (len(self.prefetched) + 1) * self.ensemble > self.prefetch_limit:
+                self.prefetch_stats["over_limit"] += 1
+                continue
+            messages = self.build_messages(game_state, history)
+            self.prefetched.append((messages, self.submit(self.areply_with_votes(messages)), time.perf_counter()))
+            self.prefetch_stats["requests"] += 1
+    
+    def take_prefetched(self, messages):
+        """
+        The prefetched request for exactly these messages, as (future, time
+        sent), if there was one. Requests for the other predicted states are
+        cancelled, in flight or still waiting for the rate limit, and their
+        ensemble votes are never counted.
+        """
+        prefetched, self.prefetched = self.prefetched, []
+        hit = None
+        for predicted, future, sent in prefetched:
+            if hit is None and predicted == messages:
+                hit = future, sent
+            else:
+                future.cancel()
+        if prefetched:
+            self.prefetch_stats["hits" if hit is not None else "misses"] += 1
+        return hit
+    
+    def agreement(self):
+        """
+        Share of the replies received before each decision that voted for the played action
+        """
+        if not self.ensemble_stats["replies"]:
+            return 0.0
+        return self.ensemble_stats["winning_votes"] / self.ensemble_stats["replies"]
+    
+    @staticmethod
+    def log_messages(messages):
+        """
+        Log the text of each message at debug level
+        """
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str):
+                logger.debug(content)
+            else:
+                logger.debug("\n".join(part["text"] for part in content if part["type"] == "text"))
+    
+    def route(self, game_state):
+        """
+        Action for a state with an obvious move, or None to ask the model
+        """
+        routed = obvious_action(self.get_visible_array(), game_state["founder_position"],
+                                self.game.founder.direction, self.macro_actions)
+        if routed is None:
+            self.router_stats["escalated"] += 1
+            return None
+        action, rule = routed
+        self.router_stats[rule] += 1
+        logger.info("Router played %s (%s)", action, rule)
+        return action
+    
+    def escalation_rate(self):
+        """
+        Fraction of routed decisions that went to the model
+        """
+        decisions = sum(self.router_stats.values())
+        return self.router_stats["escalated"] / decisions if decisions else 0.0
+    
+    def start_request(self, game_state):
+        """
+        Called when the model is asked about this step, once the router and
+        the circuit breaker have let it through; a hook for subclasses
+        """
+    
+    def choose_action(self, game_state):
+        """
+        Choose an action based on OpenAI's recommendation
+        """
+        decision_start = time.perf_counter()
+        if self.router:
+            action = self.route(game_state)
+            self.profiler.record("decision.route", time.perf_counter() - decision_start)
+            if action is not None:
+                self.last_latency = None
+                self.current_action = action
+                if self.prefetch:
+                    self.start_prefetch(action)
+                return action
+            decision_start = time.perf_counter()
+        
+        if self.breaker is not None and not self.breaker.allow():
+            # The API is down: play locally until the breaker lets a probe through
+            self.degraded_steps += 1
+            self.take_prefetched(None)
+            self.last_latency = None
+            action = self.fallback(self, game_state)
+            self.current_action = action
+            return action
+        
+        self.start_request(game_state)
+        messages = self.build_messages(game_state)
+        prefetched = self.take_prefetched(messages)
+        self.profiler.record("decision.prompt", time.perf_counter() - decision_start)
+        
+        self.last_latency = None
         try:
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model="gpt-4.1-2025-04-14",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.2,  # Lower temperature for more consistent responses
-                max_tokens=10,     # We only need a few tokens for the action
-            )
+            # Call OpenAI API, or wait for the request sent while the last action played
+            request_start = time.perf_counter()
+            action_text = None
+            if prefetched is not None:
+                future, sent = prefetched
+                try:
+                    action_text, queued, tally = future.result()
+                    self.count_votes(tally)
+                    # Only the part of its rate limit wait that this decision still had to wait through
+                    queued = max(0.0, min(sent + queued, time.perf_counter()) - request_start)
+                except Exception as e:
+                    logger.info("Prefetched request failed, asking again: %s", e)
+            if action_text is None:
+                action_text, queued = self.fetch_reply(messages)
+            if self.breaker is not None:
+                self.breaker.record_success()
+            self.last_latency = time.perf_counter() - request_start
+            # Waiting for the shared rate limit is queueing, not network time
+            if self.scheduler is not None:
+                self.profiler.record("decision.queue", queued)
+            self.profiler.record("decision.network", self.last_latency - queued)
             
-            print(system_prompt)
-            print(user_prompt)
+            self.log_messages(messages)
+            logger.debug("Reply: %s", action_text)
             # Extract the chosen action
-            action_text = response.choices[0].message.content.strip().lower()
-            
-            # Direct matching with valid actions
-            valid_actions = ["pivot", "build", "talk_to_user", "fundraise"]
-            
-            # Try exact match first
-            if action_text in valid_actions:
-                self.current_action = action_text
-                return action_text
-                
-            # Try to extract valid action if the response includes extra text
-            for valid_action in valid_actions:
-                if valid_action in action_text:
-                    # Log that we had to clean up the response
-                    print(f"Cleaned up OpenAI response from '{action_text}' to '{valid_action}'")
-                    self.current_action = valid_action
-                    return valid_action
-            
-            # If no valid action found, default to a random action
-            print(f"OpenAI returned invalid action: '{action_text}', using random action instead")
-            random_action = random.choice(valid_actions)
-            self.current_action = random_action
-            return random_action
+            parse_start = time.perf_counter()
+            action = self.parse_action(action_text)
+            self.profiler.record("decision.parse", time.perf_counter() - parse_start)
             
         except Exception as e:
-            print(f"Error calling OpenAI API: {e}")
-            # Fallback to random action if API call fails
-            random_action = random.choice(self.actions)
-            self.current_action = random_action
-            return random_action
+            logger.warning("Error calling OpenAI API: %s", e)
+            self.response_stats["errors"] += 1
+            if self.breaker is not None:
+                self.breaker.record_failure()
+            # Fall back to the local policy (a random action by default) if the API call fails
+            action = self.fallback(self, game_state)
+        
+        self.current_action = action
+        if self.prefetch:
+            self.start_prefetch(action)
+        return action
     
     def extract_readme_sections(self, section_names):
         """Extract only specific sections from the README content"""
@@ -448,7 +1182,8 @@ Do not include any explanation, just the action name.
         
         return '\n'.join(result)
     
-    def map_to_string(self, visible_map, founder_position):
+    @staticmethod
+    def map_to_string(visible_map, founder_position):
         """
         Convert the numeric map to a string representation
         -1 = unknown/fog of war (?), 
@@ -480,19 +1215,117 @@ Do not include any explanation, just the action name.
         return "\n".join(map_rows)
 
 
+# Values of PLAYER_TYPE
+PLAYER_TYPES = ("dumb", "mcts", "ai", "vision", "plan")
+
+
+def make_player(player_type, layout=None, **options):
+    """
+    A player of one of PLAYER_TYPES, configured from the environment variables
+    described in the README; options go to the player's constructor (or
+    MCTSPlayer.from_env). Without OPENAI_API_KEY, LLM players that would call
+    the OpenAI API are replaced by a DumbPlayer.
+    """
+    if player_type not in PLAYER_TYPES:
+        raise ValueError(f"Unknown player type {player_type!r}, expected one of {', '.join(PLAYER_TYPES)}")
+    if player_type == "dumb":
+        return DumbPlayer(layout)
+    if player_type == "mcts":
+        from mcts_player import MCTSPlayer
+        return MCTSPlayer.from_env(layout, **options)
+    
+    # LLM_BACKEND=stub answers in-process; otherwise LLM_MODEL at LLM_BASE_URL (default: the OpenAI API)
+    backend = backend_from_env()
+    # Only the OpenAI API itself needs a key (not a cassette being replayed)
+    needs_key = (isinstance(backend, OpenAIBackend) and not backend.base_url and
+                 not (os.environ.get("CASSETTE") and os.environ.get("CASSETTE_MODE") == "replay"))
+    if needs_key and not os.environ.get("OPENAI_API_KEY"):
+        logger.warning("OPENAI_API_KEY environment variable not set, defaulting to DumbPlayer")
+        return DumbPlayer(layout)
+    
+    options = dict({
+        "backend": backend,
+        # MACRO_ACTIONS=0 limits the model to the four basic actions
+        "macro_actions": os.environ.get("MACRO_ACTIONS", "1") != "0",
+        # STRUCTURED_OUTPUT=0 asks for plain text replies, for servers without JSON schema support
+        "structured_output": os.environ.get("STRUCTURED_OUTPUT", "1") != "0",
+        # ROUTER=1 plays obvious moves by rule and only asks the model about the rest
+        "router": os.environ.get("ROUTER", "0") != "0",
+        # ENSEMBLE=5 asks 5 times at once (at ENSEMBLE_TEMPERATURE) and plays the majority's action
+        "ensemble": int(os.environ.get("ENSEMBLE", "1")),
+        "ensemble_temperature": float(os.environ.get("ENSEMBLE_TEMPERATURE", "0.8")),
+    }, **options)
+    if player_type == "plan":
+        logger.info("Using PlanningAIPlayer")
+        from planning_player import PlanningAIPlayer
+        return PlanningAIPlayer(layout, int(os.environ.get("PLAN_LENGTH", "8")), **options)
+    if player_type == "vision":
+        logger.info("Using VisionAIPlayer")
+        from vision_player import VisionAIPlayer
+        return VisionAIPlayer(layout, **options)
+    logger.info("Using AIPlayer")
+    # PREFETCH=1 sends the next request while the current move plays (OpenAI Player only),
+    # PREFETCH_LIMIT caps the requests prefetched per move (default 3, or the ensemble size)
+    options.setdefault("prefetch", os.environ.get("PREFETCH", "0") != "0")
+    if os.environ.get("PREFETCH_LIMIT"):
+        options.setdefault("prefetch_limit", int(os.environ["PREFETCH_LIMIT"]))
+    return AIPlayer(layout, **options)
+
+
 if __name__ == "__main__":
     # Choose which player to use (default to AIPlayer)
     player_type = os.environ.get("PLAYER_TYPE", "ai").lower()
     print(player_type)
-    if player_type == "dumb":
-        player = DumbPlayer()
-    else:
-        if not os.environ.get("OPENAI_API_KEY"):
-            print("WARNING: OPENAI_API_KEY environment variable not set.")
-            print("Defaulting to DumbPlayer.")
-            player = DumbPlayer()
-        else:
-            print('using AIPlayer')
-            player = AIPlayer()
+    # LOG_LEVEL=DEBUG prints every prompt and reply, INFO also repaired replies
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "WARNING").upper(), format="%(message)s")
+    
+    # SEED makes the game reproducible: the same maze (unless from the corpus) and pivots
+    if os.environ.get("SEED"):
+        random.seed(int(os.environ["SEED"]))
+    # CASSETTE records API responses to a file and replays them (CASSETTE_MODE=record, replay or auto)
+    cassette_mode = os.environ.get("CASSETTE_MODE", "auto")
+    
+    # Play maze number MAZE_INDEX from the corpus at MAZE_CORPUS instead of a new random maze
+    layout = None
+    if os.environ.get("MAZE_CORPUS"):
+        from maze_corpus import MazeCorpus
+        layout = MazeCorpus(os.environ["MAZE_CORPUS"])[int(os.environ.get("MAZE_INDEX", "0"))]
+    
+    player = make_player(player_type, layout)
+    
+    # Record the game to a replay archive if REPLAY_PATH is set
+    if os.environ.get("REPLAY_PATH"):
+        player.start_replay(os.environ["REPLAY_PATH"], record_latency=isinstance(player, AIPlayer))
+    # Stream transitions into NPZ shards if DATASET_DIR is set
+    if os.environ.get("DATASET_DIR"):
+        player.start_dataset(os.environ["DATASET_DIR"])
+    # Record a video (.png for an animated PNG, or any format ffmpeg writes) if VIDEO_PATH is set
+    if os.environ.get("VIDEO_PATH"):
+        player.start_video(os.environ["VIDEO_PATH"], frame_skip=int(os.environ.get("VIDEO_FRAME_SKIP", "1")))
+    # Write per-step phase timings to PROFILE_CSV and/or a Prometheus textfile at PROFILE_PROM
+    profile_sinks = []
+    if os.environ.get("PROFILE_CSV"):
+        from profiling import CSVSink
+        profile_sinks.append(CSVSink(os.environ["PROFILE_CSV"]))
+    if os.environ.get("PROFILE_PROM"):
+        from profiling import PrometheusSink
+        profile_sinks.append(PrometheusSink(os.environ["PROFILE_PROM"]))
+    if profile_sinks:
+        player.start_profiling(*profile_sinks)
+    # Serve requests from the CASSETTE file, taking as long as when recorded if CASSETTE_LATENCY=1
+    if isinstance(player, AIPlayer) and os.environ.get("CASSETTE"):
+        player.use_cassette(os.environ["CASSETTE"], cassette_mode, os.environ.get("CASSETTE_LATENCY", "0") != "0")
+    # CIRCUIT_BREAKER=1 stops calling the API after BREAKER_FAILURES failed requests in a row,
+    # playing the FALLBACK policy (explore or random) and retrying after BREAKER_RESET seconds
+    if isinstance(player, AIPlayer) and os.environ.get("CIRCUIT_BREAKER", "0") != "0":
+        from circuit_breaker import CircuitBreaker
+        breaker = CircuitBreaker(int(os.environ.get("BREAKER_FAILURES", "3")),
+                                 float(os.environ.get("BREAKER_RESET", "30")))
+        player.set_circuit_breaker(breaker, os.environ.get("FALLBACK", "explore"),
+                                   float(os.environ["REQUEST_TIMEOUT"]) if os.environ.get("REQUEST_TIMEOUT") else None)
+    # Stay under the API's per-minute limits (RATE_LIMIT_RPM requests, RATE_LIMIT_TPM tokens)
+    if isinstance(player, AIPlayer) and (os.environ.get("RATE_LIMIT_RPM") or os.environ.get("RATE_LIMIT_TPM")):
+        from rate_limit import RateLimitScheduler
+        player.share_rate_limit(RateLimitScheduler.from_env())
     
     player.run() 
\ No newline at end of file
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+
+# Benchmarks never open a real window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+from idea_maze import IdeaMaze, GRID_SIZE, CELL_SIZE, MARGIN, generate_maze, check_path
+from headless_maze import ACTIONS, HeadlessMaze
+
+GRID_SIZES = [12, 24, 48]
+WALL_PROBABILITIES = [0.2, 1/3, 0.45]
+
+# Registered benchmarks: name -> setup function returning the callable to time
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def make_game(seed=0):
+    """
+    IdeaMaze with a few cells explored, as in the middle of a game
+    """
+    game = IdeaMaze(seed=seed)
+    for _ in range(5):
+        game.founder.talk_to_user()
+        game.update_visited_cells()
+        game.founder.build(game.debug_maze)
+    return game
+
+
+def register_generator_benchmarks():
+    for grid_size in GRID_SIZES:
+        for wall_probability in WALL_PROBABILITIES:
+            name = f"generate_maze[{grid_size}x{grid_size},walls={wall_probability:.2f}]"
+
+            def setup(grid_size=grid_size, wall_probability=wall_probability):
+                rng = random.Random(0)
+                return lambda: generate_maze(rng, grid_size, wall_probability)
+            BENCHMARKS[name] = setup
+
+        name = f"check_path[{grid_size}x{grid_size}]"
+
+        def setup(grid_size=grid_size):
+            maze, pmf_pos, founder_pos = generate_maze(random.Random(0), grid_size)
+            return lambda: check_path(maze, founder_pos, pmf_pos)
+        BENCHMARKS[name] = setup
+
+
+register_generator_benchmarks()
+
+
+@benchmark("update_visited_cells")
+def setup_update_visited_cells():
+    game = make_game()
+    return game.update_visited_cells
+
+
+@benchmark("get_visible_map")
+def setup_get_visible_map():
+    from ai_player import DumbPlayer
+    player = DumbPlayer()
+    player.game = make_game()
+    return player.get_visible_map
+
+
+@benchmark("map_to_string")
+def setup_map_to_string():
+    from ai_player import DumbPlayer, AIPlayer
+    player = DumbPlayer()
+    player.game = make_game()
+    visible_map = player.get_visible_map()
+    founder_position = (player.game.founder.x, player.game.founder.y)
+    return lambda: AIPlayer.map_to_string(visible_map, founder_position)
+
+
+def setup_llm_decision(**options):
+    from ai_player import AIPlayer
+    from llm_backends import StubBackend
+    player = AIPlayer(backend=StubBackend(seed=0), **options)
+    player.game = make_game()
+    return lambda: player.choose_action(player.get_game_state())
+
+
+# The whole decision pipeline (prompt building, request, parsing) against the in-process stub backend
+BENCHMARKS["llm_decision[stub]"] = setup_llm_decision
+BENCHMARKS["llm_decision[stub,router]"] = lambda: setup_llm_decision(router=True)
+
+
+@benchmark("headless_episode")
+def setup_headless_episode():
+    maze, pmf_pos, founder_pos = generate_maze(random.Random(0))
+
+    def episode():
+        # Same seed every call, so every call plays the same episode
+        rng = random.Random(0)
+        world = HeadlessMaze(maze, founder_pos, pmf_pos, 0, rng=rng)
+        while not world.done:
+            world.step(rng.choice(ACTIONS))
+    return episode
+
+
+@benchmark("draw_maze_frame")
+def setup_draw_maze_frame():
+    game = make_game()
+
+    def frame():
+        game.screen.fill((255, 255, 255))
+        game.draw_maze(game.debug_maze, MARGIN)
+        game.draw_maze(game.player_maze, MARGIN * 2 + GRID_SIZE * CELL_SIZE, True)
+        game.draw_founder(MARGIN)
+        game.draw_founder(MARGIN * 2 + GRID_SIZE * CELL_SIZE)
+        pygame.display.flip()
+    return frame
+
+
+def measure(function, min_time=0.2, repeats=5):
+    """
+    Time function, calling it enough times per repeat to fill min_time / repeats.
+    Returns seconds per call for each repeat.
+    """
+    # Calibrate the number of calls per repeat
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats:
+            break
+        calls *= 2 if elapsed == 0 else max(2, min(int(min_time / repeats / elapsed) + 1, 100))
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        samples.append((time.perf_counter() - start) / calls)
+    return samples, calls
+
+
+def run(names, min_time=0.2, repeats=5):
+    results = {}
+    for name in names:
+        function = BENCHMARKS[name]()
+        samples, calls = measure(function, min_time, repeats)
+        median = statistics.median(samples)
+        results[name] = {
+            "median": median,
+            "mean": statistics.mean(samples),
+            "min": min(samples),
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "calls_per_repeat": calls,
+            "repeats": repeats,
+            "ops_per_second": 1 / median if median > 0 else float("inf"),
+        }
+        print(f"{name:45s} {median * 1e6:12.2f} us/call")
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pygame.version.ver,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare medians against a baseline. Returns the names that got slower by more than threshold.
+    """
+    regressions = []
+    print()
+    print(f"{'benchmark':45s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["median"]
+        after = result["median"]
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:45s} {before * 1e6:10.2f}us {after * 1e6:10.2f}us {change:+8.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Idea Maze engine, generator, renderer and agents")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown (fraction of the baseline median) counted as a regression")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend timing each benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if args.list:
+        print("\n".join(names))
+        sys.exit(0)
+
+    results = run(names, args.min_time, args.repeats)
+    report = {"environment": environment(), "results": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from llm_backends import LLMBackend
+
+MODES = ("record", "replay", "auto")
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised in replay mode for a request that isn't in the cassette
+    """
+
+
+def request_key(request):
+    """
+    Hash of a chat completion request (model, messages and every option), as a hex string
+    """
+    return hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def to_data(value):
+    """
+    JSON-friendly copy of an API response object
+    """
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, SimpleNamespace):
+        value = vars(value)
+    if isinstance(value, dict):
+        return {key: to_data(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_data(item) for item in value]
+    return value
+
+
+def to_namespace(data):
+    """
+    Response data back as attribute-access objects, like the client's response objects
+    """
+    if isinstance(data, dict):
+        return SimpleNamespace(**{key: to_namespace(item) for key, item in data.items()})
+    if isinstance(data, list):
+        return [to_namespace(item) for item in data]
+    return data
+
+
+class Cassette:
+    """
+    Recorded chat completion responses, keyed by a hash of the request, in a
+    JSON lines file (one response and its latency per line, appended as they
+    are recorded). In "record" mode every request goes to the API and is
+    recorded; in "replay" mode requests are only served from the cassette,
+    instantly or after the recorded latency with simulate_latency; "auto"
+    replays what it has and records the rest. Requests made several times
+    replay their responses in recorded order, repeating the last one.
+    """
+    def __init__(self, path, mode="auto", simulate_latency=False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {', '.join(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.lock = threading.Lock()
+        # Request key -> [(response data, latency)] and how many of them were replayed
+        self.entries = {}
+        self.replayed = {}
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+        if mode != "record" and os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries.setdefault(entry["key"], []).append((entry["response"], entry["latency"]))
+
+    def lookup(self, key):
+        """
+        (response data, latency) to replay for key, or None to call the API
+        """
+        with self.lock:
+            recorded = self.entries.get(key)
+            if self.mode == "record" or not recorded:
+                self.stats["misses"] += 1
+                return None
+            index = self.replayed.get(key, 0)
+            if index >= len(recorded) and self.mode == "auto":
+                # Asked more often than recorded: get a new response
+                self.stats["misses"] += 1
+                return None
+            self.replayed[key] = index + 1
+            self.stats["hits"] += 1
+            return recorded[min(index, len(recorded) - 1)]
+
+    def record(self, key, response, latency):
+        data = to_data(response)
+        with self.lock:
+            self.entries.setdefault(key, []).append((data, latency))
+            self.replayed[key] = len(self.entries[key])
+            with open(self.path, "a") as f:
+                f.write(json.dumps({"key": key, "latency": latency, "response": data}) + "\n")
+            self.stats["recorded"] += 1
+
+    def replay(self, request):
+        """
+        (request key, recorded response or None), raising CassetteMiss in replay mode
+        """
+        key = request_key(request)
+        entry = self.lookup(key)
+        if entry is None:
+            if self.mode == "replay":
+                raise CassetteMiss(f"Request {key[:12]} is not in cassette {self.path}")
+            return key, None
+        return key, entry
+
+
+class CassetteBackend(LLMBackend):
+    """
+    Sends requests through a Cassette, calling backend (see llm_backends.py)
+    only for requests it has to record
+    """
+    def __init__(self, backend, cassette):
+        self.backend = backend
+        self.cassette = cassette
+        self.model = backend.model
+
+    def create(self, **request):
+        key, entry = self.cassette.replay(request)
+        if entry is not None:
+            data, latency = entry
+            if self.cassette.simulate_latency:
+                time.sleep(latency)
+            return to_namespace(data)
+        start = time.perf_counter()
+        response = self.backend.create(**request)
+        self.cassette.record(key, response, time.perf_counter() - start)
+        return response
+
+    async def acreate(self, **request):
+        key, entry = self.cassette.replay(request)
+        if entry is not None:
+            data, latency = entry
+            if self.cassette.simulate_latency:
+                await asyncio.sleep(latency)
+            return to_namespace(data)
+        start = time.perf_counter()
+        response = await self.backend.acreate(**request)
+        self.cassette.record(key, response, time.perf_counter() - start)
+        return response
+
+    def with_options(self, **options):
+        return CassetteBackend(self.backend.with_options(**options), self.cassette)
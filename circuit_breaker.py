@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+from policy_router import explore_action
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing API. Closed (normal) until failure_threshold
+    calls fail in a row, then open: calls are refused for reset_timeout
+    seconds, after which it is half-open and lets a single probe call
+    through. A successful probe closes it again, a failed one reopens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.stats = {"trips": 0, "probes": 0, "recoveries": 0, "refused": 0}
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """
+        Whether a call may go ahead now. In the half-open state only the first caller gets through.
+        """
+        with self.lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                self.stats["probes"] += 1
+                return True
+            self.stats["refused"] += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                self.stats["recoveries"] += 1
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.failure_threshold):
+                if self.opened_at is None:
+                    self.stats["trips"] += 1
+                self.opened_at = self.clock()
+                self.probing = False
+
+
+def random_fallback(player, game_state):
+    """
+    A random basic action, what the LLM players always did when a request failed
+    """
+    return random.choice(player.actions)
+
+
+def explore_fallback(player, game_state):
+    """
+    policy_router.explore_action on the player's view of the game
+    """
+    return explore_action(player.get_visible_array(), game_state["founder_position"],
+                          player.game.founder.direction, player.macro_actions)
+
+
+# Local policies an LLM player can fall back on, by name
+FALLBACKS = {"random": random_fallback, "explore": explore_fallback}
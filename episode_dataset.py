@@ -0,0 +1,189 @@
+import os
+import glob
+import atexit
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from headless_maze import ACTIONS
+
+ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+
+DEFAULT_SHARD_SIZE = 100_000
+
+# Columns stored in every shard, with their dtype and per-transition shape.
+# observation is the fog-masked map before the action (-1 fog, 0 empty, 1 wall, 2 PMF),
+# the other state columns are also from before the action.
+SCALAR_COLUMNS = {
+    "episode": np.int64,
+    "step": np.int32,
+    "direction": np.int8,
+    "temporary_boost": np.int8,
+    "runway": np.int16,
+    "action": np.uint8,
+    "reward": np.float32,
+    "done": np.bool_,
+}
+
+
+def new_episode_id():
+    """
+    Random 63-bit episode id, unique across writers and processes for all practical purposes
+    """
+    return int.from_bytes(os.urandom(8), "big") >> 1
+
+
+class TransitionWriter:
+    """
+    Streams transitions into compressed columnar NPZ shards of shard_size rows.
+    Rows go into preallocated numpy buffers, so memory stays at two shards
+    (one filling, one being compressed in a background thread) no matter how
+    many transitions are written. Shards are named <prefix>-<writer id>-00000.npz,
+    ... with a random writer id, and only appear once fully written, so any
+    number of writers in any number of processes can share a directory.
+    Episodes get random ids (see add). Safe to use from several threads.
+    """
+    def __init__(self, directory, shard_size=DEFAULT_SHARD_SIZE, prefix="transitions", compress=True):
+        self.directory = directory
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+
+        self.writer_id = uuid.uuid4().hex[:12]
+        self.shard_index = 0
+        self.buffers = None
+        self.size = 0
+        # Episode id of the stream of transitions added without one, and the next step of each open episode
+        self.episode = None
+        self.steps = {}
+        self.transitions_written = 0
+        self.lock = threading.Lock()
+
+        # Compression runs in the background while the next shard fills
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = None
+
+    def allocate(self, shape):
+        self.buffers = {name: np.empty(self.shard_size, dtype=dtype) for name, dtype in SCALAR_COLUMNS.items()}
+        self.buffers["observation"] = np.empty((self.shard_size,) + shape, dtype=np.int8)
+        self.buffers["position"] = np.empty((self.shard_size, 2), dtype=np.int16)
+
+    def add(self, observation, action, runway, position, direction, temporary_boost, reward, done, episode=None):
+        """
+        Add one transition. observation is the fog-masked map (any array-like)
+        seen before taking action. episode is the id of the game it belongs to
+        (see new_episode_id), so several games can write at once; without it,
+        transitions form one stream of episodes, each with a new random id and
+        ending with a transition with done set. The step column counts each
+        episode's transitions.
+        """
+        observation = np.asarray(observation, dtype=np.int8)
+        with self.lock:
+            if episode is None:
+                if self.episode is None:
+                    self.episode = new_episode_id()
+                episode = self.episode
+                if done:
+                    self.episode = None
+            step = self.steps.pop(episode, 0)
+            if not done:
+                self.steps[episode] = step + 1
+            self.append(observation, action, runway, position, direction, temporary_boost, reward, done,
+                        episode, step)
+
+    def append(self, observation, action, runway, position, direction, temporary_boost, reward, done,
+               episode, step):
+        if self.buffers is None or self.buffers["observation"].shape[1:] != observation.shape:
+            # A new maze size needs its own shard
+            self.flush()
+            self.allocate(observation.shape)
+
+        i = self.size
+        buffers = self.buffers
+        buffers["observation"][i] = observation
+        buffers["position"][i] = position
+        buffers["episode"][i] = episode
+        buffers["step"][i] = step
+        buffers["direction"][i] = getattr(direction, "value", direction)
+        buffers["temporary_boost"][i] = temporary_boost
+        buffers["runway"][i] = runway
+        buffers["action"][i] = ACTION_CODES[action]
+        buffers["reward"][i] = reward
+        buffers["done"][i] = done
+        self.size += 1
+
+        if self.size == self.shard_size:
+            self.flush()
+
+    def flush(self, background=True):
+        """
+        Write the rows collected so far as a shard, in the background thread unless background is False
+        """
+        if not self.size:
+            return
+
+        # Hand the full buffers to the background thread; append starts new ones when needed,
+        # so closing doesn't allocate a shard's worth of buffers for nothing
+        columns = {name: buffer[:self.size] for name, buffer in self.buffers.items()}
+        path = os.path.join(self.directory, f"{self.prefix}-{self.writer_id}-{self.shard_index:05d}.npz")
+        self.wait()
+        if background:
+            self.pending = self.executor.submit(self.write_shard, path, columns)
+        else:
+            self.write_shard(path, columns)
+
+        self.transitions_written += self.size
+        self.shard_index += 1
+        self.size = 0
+        self.buffers = None
+
+    def write_shard(self, path, columns):
+        # Written under a temporary name and renamed, so readers never see half a shard
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            (np.savez_compressed if self.compress else np.savez)(f, **columns)
+        os.replace(temporary, path)
+
+    def wait(self):
+        """
+        Wait for the shard being written, re-raising any error from the writer thread
+        """
+        if self.pending is not None:
+            self.pending.result()
+            self.pending = None
+
+    def close(self):
+        # The last shard is written here: at exit the background thread may already be shut down
+        with self.lock:
+            self.wait()
+            self.flush(background=False)
+        self.executor.shutdown()
+
+
+_shared_writers = {}
+_shared_lock = threading.Lock()
+
+
+def shared_writer(directory, **kwargs):
+    """
+    This process's TransitionWriter for directory, created on first use and
+    closed at exit, so every game played in the process fills the same shards
+    instead of each writing a small shard of its own
+    """
+    key = os.path.abspath(directory)
+    with _shared_lock:
+        writer = _shared_writers.get(key)
+        if writer is None:
+            writer = _shared_writers[key] = TransitionWriter(directory, **kwargs)
+            atexit.register(writer.close)
+        return writer
+
+
+def read_shards(directory, prefix="transitions"):
+    """
+    Yield each shard in a directory as a dict of column arrays
+    """
+    for path in sorted(glob.glob(os.path.join(directory, f"{prefix}-*.npz"))):
+        with np.load(path) as shard:
+            yield {name: shard[name] for name in shard.files}
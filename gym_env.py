@@ -0,0 +1,260 @@
+import random
+import numpy as np
+import gymnasium
+from gymnasium import spaces
+from gymnasium.vector import AsyncVectorEnv, AutoresetMode, SyncVectorEnv, VectorEnv
+from gymnasium.utils import seeding
+from gymnasium.vector.utils import batch_space
+from maze_core import GRID_SIZE, generate_maze
+from headless_maze import ACTIONS, DIRECTION_DELTAS, STARTING_RUNWAY, WIN_REWARD, HeadlessMaze
+from maze_corpus import MazeCorpus
+from rgb_render import render_player_view, render_player_views
+
+
+def make_observation_space(grid_size, runway):
+    """
+    Fog-masked map (-1 unexplored, 0 empty, 1 wall, 2 PMF) plus the founder's
+    x, y, direction, temporary visibility boost and runway
+    """
+    return spaces.Dict({
+        "map": spaces.Box(-1, 2, (grid_size, grid_size), dtype=np.int8),
+        "state": spaces.Box(
+            low=np.zeros(5, dtype=np.int16),
+            high=np.array([grid_size - 1, grid_size - 1, 3, 1, runway], dtype=np.int16),
+            dtype=np.int16,
+        ),
+    })
+
+
+class IdeaMazeEnv(gymnasium.Env):
+    """
+    Gymnasium environment for The Idea Maze, running on the headless engine.
+    Actions are indices into DumbPlayer.actions (pivot, build, talk_to_user,
+    fundraise). Reaching PMF gives a reward of 1 and ends the episode, as
+    does running out of runway. Mazes are generated fresh on every reset,
+    or drawn from a maze corpus if one is given.
+    """
+    metadata = {"render_modes": ["rgb_array"], "render_fps": 4}
+
+    def __init__(self, render_mode=None, grid_size=GRID_SIZE, wall_probability=1/3,
+                 runway=STARTING_RUNWAY, corpus=None):
+        if isinstance(corpus, str):
+            corpus = MazeCorpus(corpus)
+        if corpus is not None:
+            grid_size = corpus.grid_size
+
+        self.render_mode = render_mode
+        self.grid_size = grid_size
+        self.wall_probability = wall_probability
+        self.runway = runway
+        self.corpus = corpus
+
+        self.action_space = spaces.Discrete(len(ACTIONS))
+        self.observation_space = make_observation_space(grid_size, runway)
+        self.world = None
+
+    def get_observation(self):
+        world = self.world
+        return {
+            "map": world.get_visible_map(),
+            "state": np.array([world.x, world.y, world.direction, world.temporary_boost, world.runway],
+                              dtype=np.int16),
+        }
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        rng = random.Random(int(self.np_random.integers(2**63)))
+
+        # A layout can be passed in options, otherwise one comes from the corpus or the generator
+        layout = (options or {}).get("layout")
+        if layout is None and self.corpus is not None:
+            layout = self.corpus[int(self.np_random.integers(len(self.corpus)))]
+
+        if layout is not None:
+            self.world = HeadlessMaze.from_layout(layout, self.runway, rng)
+        else:
+            maze, pmf_pos, founder_pos = generate_maze(rng, self.grid_size, self.wall_probability)
+            self.world = HeadlessMaze(maze, founder_pos, pmf_pos, rng.randrange(4), self.runway, rng=rng)
+
+        return self.get_observation(), {}
+
+    def step(self, action):
+        reward = self.world.step(ACTIONS[int(action)])
+        info = {"won": self.world.game_won}
+        return self.get_observation(), reward, self.world.done, False, info
+
+    def render(self):
+        if self.render_mode == "rgb_array":
+            world = self.world
+            return render_player_view(world.maze, world.visited_cells, world.x, world.y, world.direction)
+
+
+class BatchedIdeaMazeEnv(VectorEnv):
+    """
+    num_envs games stepped together in one process. The game rules are
+    applied to all games at once with numpy, so a step costs a handful of
+    array operations regardless of num_envs. Finished games reset on the
+    next step, like gymnasium's SyncVectorEnv.
+    """
+    metadata = {"render_modes": ["rgb_array"], "render_fps": 4, "autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(self, num_envs, render_mode=None, grid_size=GRID_SIZE, wall_probability=1/3,
+                 runway=STARTING_RUNWAY, corpus=None):
+        if isinstance(corpus, str):
+            corpus = MazeCorpus(corpus)
+        if corpus is not None:
+            grid_size = corpus.grid_size
+
+        self.num_envs = num_envs
+        self.render_mode = render_mode
+        self.grid_size = grid_size
+        self.wall_probability = wall_probability
+        self.starting_runway = runway
+        self.corpus = corpus
+
+        self.single_action_space = spaces.Discrete(len(ACTIONS))
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.single_observation_space = make_observation_space(grid_size, runway)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        # Game state for every environment
+        shape = (num_envs, grid_size, grid_size)
+        self.maze = np.zeros(shape, dtype=np.int8)
+        self.visited = np.zeros(shape, dtype=bool)
+        self.x = np.zeros(num_envs, dtype=np.int64)
+        self.y = np.zeros(num_envs, dtype=np.int64)
+        self.direction = np.zeros(num_envs, dtype=np.int64)
+        self.temporary_boost = np.zeros(num_envs, dtype=np.int64)
+        self.runway = np.zeros(num_envs, dtype=np.int64)
+        self.pmf_x = np.zeros(num_envs, dtype=np.int64)
+        self.pmf_y = np.zeros(num_envs, dtype=np.int64)
+        self.needs_reset = np.zeros(num_envs, dtype=bool)
+        self.env_index = np.arange(num_envs)
+
+        self.deltas = np.array(DIRECTION_DELTAS)
+        # Every offset that can be visible, with how much visibility it needs
+        offsets = [(dx, dy) for dy in range(-2, 3) for dx in range(-2, 3)]
+        self.visible_offsets = [(dx, dy, max(abs(dx), abs(dy))) for dx, dy in offsets]
+
+        self.py_rng = random.Random()
+
+    def reset_envs(self, indices):
+        for i in indices:
+            if self.corpus is not None:
+                layout = self.corpus[int(self.np_random.integers(len(self.corpus)))]
+                maze, pmf_pos = layout["maze"], layout["pmf_pos"]
+                founder_pos, direction = layout["founder_pos"], layout["direction"]
+            else:
+                maze, pmf_pos, founder_pos = generate_maze(self.py_rng, self.grid_size, self.wall_probability)
+                direction = self.py_rng.randrange(4)
+
+            self.maze[i] = maze
+            self.visited[i] = False
+            self.x[i], self.y[i] = founder_pos
+            self.pmf_x[i], self.pmf_y[i] = pmf_pos
+            self.direction[i] = direction
+            self.temporary_boost[i] = 0
+            self.runway[i] = self.starting_runway
+
+        mask = np.zeros(self.num_envs, dtype=bool)
+        mask[list(indices)] = True
+        self.mark_visible(mask)
+
+    def mark_visible(self, mask):
+        """
+        Mark the cells currently visible to the founder as visited, in the games selected by mask
+        """
+        visibility = 1 + self.temporary_boost
+        for dx, dy, distance in self.visible_offsets:
+            cx, cy = self.x + dx, self.y + dy
+            selected = (mask & (distance <= visibility) & (cx >= 0) & (cx < self.grid_size)
+                        & (cy >= 0) & (cy < self.grid_size))
+            self.visited[self.env_index[selected], cy[selected], cx[selected]] = True
+
+    def get_observation(self):
+        return {
+            "map": np.where(self.visited, self.maze, -1).astype(np.int8),
+            "state": np.stack([self.x, self.y, self.direction, self.temporary_boost, self.runway],
+                              axis=1).astype(np.int16),
+        }
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self._np_random, self._np_random_seed = seeding.np_random(seed)
+        self.py_rng.seed(int(self.np_random.integers(2**63)))
+        self.reset_envs(range(self.num_envs))
+        self.needs_reset[:] = False
+        return self.get_observation(), {}
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+
+        # Games that finished on the last step start over instead of taking the action
+        resetting = self.needs_reset.copy()
+        if resetting.any():
+            self.reset_envs(np.flatnonzero(resetting))
+        acting = ~resetting
+
+        pivot = acting & (actions == 0)
+        build = acting & (actions == 1)
+        talk = acting & (actions == 2)
+
+        # Pivot to one of the other three directions at random
+        turns = self.np_random.integers(1, 4, size=self.num_envs)
+        self.direction = np.where(pivot, (self.direction + turns) % 4, self.direction)
+
+        # Build moves one cell forward unless that is off the grid or a wall
+        nx = self.x + self.deltas[self.direction, 0]
+        ny = self.y + self.deltas[self.direction, 1]
+        inside = (nx >= 0) & (nx < self.grid_size) & (ny >= 0) & (ny < self.grid_size)
+        target = self.maze[self.env_index, np.clip(ny, 0, self.grid_size - 1), np.clip(nx, 0, self.grid_size - 1)]
+        move = build & inside & (target != 1)
+        self.x = np.where(move, nx, self.x)
+        self.y = np.where(move, ny, self.y)
+
+        self.temporary_boost[build] = 0
+        self.temporary_boost[talk] = 1
+        self.runway[acting] -= 1
+
+        won = build & (self.x == self.pmf_x) & (self.y == self.pmf_y)
+        rewards[won] = WIN_REWARD
+        self.mark_visible(build | talk)
+
+        terminations = acting & (won | (self.runway <= 0))
+        self.needs_reset = terminations
+        truncations = np.zeros(self.num_envs, dtype=bool)
+        return self.get_observation(), rewards, terminations, truncations, {"won": won}
+
+    def render(self):
+        if self.render_mode == "rgb_array":
+            frames = render_player_views(self.maze, self.visited, self.x, self.y, self.direction)
+            return tuple(frames)
+
+
+def make_vector_env(num_envs, mode="batched", **env_kwargs):
+    """
+    Vector environment of num_envs games.
+    mode is "sync" (one process, one env at a time), "async" (one subprocess
+    per env), "shared_memory" (a few subprocesses writing observations into
+    shared memory) or "batched" (one process, all envs stepped together with numpy).
+    """
+    if mode == "batched":
+        return BatchedIdeaMazeEnv(num_envs, **env_kwargs)
+    if mode == "shared_memory":
+        from shm_vector_env import SharedMemoryVectorEnv
+        return SharedMemoryVectorEnv(num_envs, **env_kwargs)
+
+    env_fns = [lambda: IdeaMazeEnv(**env_kwargs) for _ in range(num_envs)]
+    if mode == "sync":
+        return SyncVectorEnv(env_fns)
+    if mode == "async":
+        return AsyncVectorEnv(env_fns)
+    raise ValueError(f"Unknown vector env mode: {mode}")
+
+
+gymnasium.register(
+    id="IdeaMaze-v0",
+    entry_point="gym_env:IdeaMazeEnv",
+    vector_entry_point="gym_env:BatchedIdeaMazeEnv",
+)
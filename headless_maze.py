@@ -0,0 +1,207 @@
+import random
+from collections import deque
+import numpy as np
+from maze_core import Direction
+
+# Actions in the same order as DumbPlayer.actions
+ACTIONS = ["pivot", "build", "talk_to_user", "fundraise"]
+
+# Macro actions, each made of several primitive actions decided inside the engine:
+# build_until_blocked keeps building while the cell ahead is open, stopping once
+# new cells come into view; pivot_to_<direction> pivots until facing that way
+# (if already facing it, a month passes like fundraise); talk_then_build talks
+# to users and then builds. Every primitive action costs a month as usual.
+MACRO_ACTIONS = ["build_until_blocked", "pivot_to_up", "pivot_to_right", "pivot_to_down", "pivot_to_left",
+                 "talk_then_build"]
+
+# Movement (dx, dy) for each Direction value
+DIRECTION_DELTAS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+# Starting runway in months, same as IdeaMaze
+STARTING_RUNWAY = 48
+
+# Reward for the step that reaches PMF; every other step is worth 0
+WIN_REWARD = 1.0
+
+
+def distance_map(maze, start):
+    """
+    BFS distances (in build steps) from start to every cell, -1 if unreachable
+    """
+    height, width = maze.shape
+    distances = np.full((height, width), -1, dtype=np.int32)
+    distances[start[1], start[0]] = 0
+    queue = deque([start])
+
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in DIRECTION_DELTAS:
+            nx, ny = x + dx, y + dy
+            if (0 <= nx < width and 0 <= ny < height and
+                maze[ny][nx] != 1 and distances[ny, nx] < 0):
+                distances[ny, nx] = distances[y, x] + 1
+                queue.append((nx, ny))
+
+    return distances
+
+
+def macro_primitives(macro, direction, front_is_open, visited_count, done):
+    """
+    Yield the primitive actions making up a macro action, one at a time, so
+    each is decided from the game state after the previous one. The game is
+    read through callables: direction() as an int, front_is_open(),
+    visited_count() and done(). Always yields at least one action.
+    """
+    if macro == "talk_then_build":
+        yield "talk_to_user"
+        if not done():
+            yield "build"
+    elif macro.startswith("pivot_to_"):
+        target = Direction[macro[len("pivot_to_"):].upper()].value
+        if direction() == target:
+            yield "fundraise"
+        while direction() != target and not done():
+            yield "pivot"
+    elif macro == "build_until_blocked":
+        while True:
+            seen = visited_count()
+            yield "build"
+            if done() or not front_is_open() or visited_count() > seen:
+                break
+    else:
+        raise ValueError(f"Unknown macro action: {macro}")
+
+
+class HeadlessMaze:
+    """
+    The Idea Maze game rules without any pygame display or images.
+    Used for simulation (rollouts, training, benchmarks) where only the
+    game state matters. Directions are stored as plain ints (Direction.value).
+    """
+    def __init__(self, maze, founder_pos, pmf_pos, direction, runway=STARTING_RUNWAY,
+                 visited_cells=None, rng=None):
+        self.maze = maze
+        self.height, self.width = maze.shape
+        self.x, self.y = founder_pos
+        self.pmf_pos = pmf_pos
+        self.direction = direction.value if isinstance(direction, Direction) else direction
+        self.base_visibility = 1
+        self.temporary_boost = 0
+        self.max_visibility = 2
+        self.runway = runway
+        self.game_won = False
+        self.game_over = False
+        # Separate RNG so simulations don't disturb the global random state
+        self.rng = rng if rng is not None else random.Random()
+
+        if visited_cells is None:
+            self.visited_cells = np.zeros((self.height, self.width), dtype=bool)
+            self.update_visited_cells()
+        else:
+            self.visited_cells = visited_cells.copy()
+
+    @classmethod
+    def from_game(cls, game, rng=None):
+        """
+        Snapshot the current state of an IdeaMaze game
+        """
+        sim = cls(game.debug_maze.copy(), (game.founder.x, game.founder.y), game.pmf_pos,
+                  game.founder.direction, game.runway, game.visited_cells, rng)
+        sim.temporary_boost = game.founder.temporary_boost
+        sim.game_won = game.game_won
+        sim.game_over = game.game_over
+        return sim
+
+    @classmethod
+    def from_layout(cls, layout, runway=STARTING_RUNWAY, rng=None):
+        """
+        New game on a prepared layout, such as an entry of a MazeCorpus
+        """
+        return cls(layout["maze"], layout["founder_pos"], layout["pmf_pos"], layout["direction"], runway, rng=rng)
+
+    def copy(self):
+        """
+        Copy of the game state. The maze itself is shared since it never changes.
+        """
+        sim = HeadlessMaze.__new__(HeadlessMaze)
+        sim.__dict__.update(self.__dict__)
+        sim.visited_cells = self.visited_cells.copy()
+        return sim
+
+    @property
+    def visibility(self):
+        return min(self.base_visibility + self.temporary_boost, self.max_visibility)
+
+    @property
+    def done(self):
+        return self.game_won or self.game_over
+
+    def update_visited_cells(self):
+        # Mark the square of currently visible cells as visited
+        v = self.visibility
+        self.visited_cells[max(self.y - v, 0):self.y + v + 1, max(self.x - v, 0):self.x + v + 1] = True
+
+    def front_cell(self):
+        """
+        Cell the founder is facing, or None if it is off the grid
+        """
+        dx, dy = DIRECTION_DELTAS[self.direction]
+        nx, ny = self.x + dx, self.y + dy
+        if 0 <= nx < self.width and 0 <= ny < self.height:
+            return nx, ny
+        return None
+
+    def front_is_open(self):
+        cell = self.front_cell()
+        return cell is not None and self.maze[cell[1]][cell[0]] != 1
+
+    def pivot(self):
+        # Choose a random direction other than the current one
+        self.direction = (self.direction + self.rng.randint(1, 3)) % 4
+
+    def build(self):
+        self.temporary_boost = 0
+        if self.front_is_open():
+            dx, dy = DIRECTION_DELTAS[self.direction]
+            self.x += dx
+            self.y += dy
+
+    def step(self, action):
+        """
+        Apply one action with the same rules and ordering as DumbPlayer.execute_action.
+        Returns the reward for the step. Macro actions run all their primitive
+        actions and return the total reward.
+        """
+        if action in MACRO_ACTIONS:
+            return sum(self.step(primitive) for primitive in macro_primitives(
+                action, lambda: self.direction, self.front_is_open,
+                lambda: int(self.visited_cells.sum()), lambda: self.done))
+
+        was_won = self.game_won
+        if action == "pivot":
+            self.pivot()
+            self.runway -= 1
+        elif action == "build":
+            self.build()
+            if (self.x, self.y) == self.pmf_pos:
+                self.game_won = True
+            self.runway -= 1
+            self.update_visited_cells()
+        elif action == "talk_to_user":
+            self.temporary_boost = 1
+            self.runway -= 1
+            self.update_visited_cells()
+        elif action == "fundraise":
+            self.runway -= 1
+
+        if self.runway <= 0:
+            self.game_over = True
+
+        return WIN_REWARD if self.game_won and not was_won else 0.0
+
+    def get_visible_map(self):
+        """
+        Fog-masked map as an int8 array: -1 for unseen cells, maze value otherwise.
+        Currently visible cells are always marked visited, so the visited mask is enough.
+        """
+        return np.where(self.visited_cells, self.maze, -1).astype(np.int8)
@@ -1,52 +1,97 @@
+import os
 import pygame
 import sys
 import random
-from enum import Enum
 import numpy as np
+from maze_core import (GRID_SIZE, CELL_SIZE, MARGIN, WINDOW_WIDTH, WINDOW_HEIGHT,
+                       WHITE, BLACK, GRAY, RED, GREEN, BLUE, DARK_RED, LIGHT_GRAY,
+                       Direction, generate_maze, check_path)
 
-# Initialize pygame
-pygame.init()
+def init_pygame():
+    """
+    Initialize only the pygame modules the game uses. pygame.init() would also
+    start audio, joysticks and everything else. Safe to call more than once.
+    """
+    pygame.display.init()
+    pygame.font.init()
 
-# Constants
-GRID_SIZE = 12
-CELL_SIZE = 50
-MARGIN = 50
-WINDOW_WIDTH = GRID_SIZE * CELL_SIZE * 2 + MARGIN * 3
-WINDOW_HEIGHT = GRID_SIZE * CELL_SIZE + MARGIN * 2 + 100  # Extra space for buttons
+# Images are looked up next to this file, not in the current directory
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-GRAY = (200, 200, 200)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-BLUE = (0, 0, 255)
-YELLOW = (255, 255, 0)
-DARK_RED = (180, 0, 0)
-LIGHT_GRAY = (230, 230, 230)
-DARK_GRAY = (120, 120, 120)  # Darker gray for previously seen walls
+# Decoded and scaled images by (path, size), and arrow glyphs by their shape,
+# shared by every game in the process
+_image_cache = {}
+_arrow_cache = {}
 
-# Direction enum
-class Direction(Enum):
-    UP = 0
-    RIGHT = 1
-    DOWN = 2
-    LEFT = 3
+def load_image(name, size=None):
+    """
+    Image from ASSET_DIR scaled to size, decoded and scaled only once per
+    (path, size). If a display mode is set, the image is converted to the
+    display's pixel format so blitting it is fast.
+    """
+    path = os.path.join(ASSET_DIR, name)
+    key = (path, size)
+    image = _image_cache.get(key)
+    if image is None:
+        if size is None:
+            image = pygame.image.load(path)
+        else:
+            image = pygame.transform.scale(load_image(name), size)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if image.get_flags() & pygame.SRCALPHA else image.convert()
+        _image_cache[key] = image
+    return image
+
+def arrow_surface(direction, length, head_size, width, color=RED):
+    """
+    Direction arrow drawn once onto a transparent square surface centered on
+    the arrow's tail, so draw_founder only has to blit it.
+    Returns (surface, center).
+    """
+    key = (direction, length, head_size, width, color)
+    cached = _arrow_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    center = length + head_size + width
+    surface = pygame.Surface((center * 2 + 1, center * 2 + 1), pygame.SRCALPHA)
+    c = center
+    if direction == Direction.UP:
+        end = (c, c - length)
+        head = [end, (end[0] - head_size, end[1] + head_size), (end[0] + head_size, end[1] + head_size)]
+    elif direction == Direction.RIGHT:
+        end = (c + length, c)
+        head = [end, (end[0] - head_size, end[1] - head_size), (end[0] - head_size, end[1] + head_size)]
+    elif direction == Direction.DOWN:
+        end = (c, c + length)
+        head = [end, (end[0] - head_size, end[1] - head_size), (end[0] + head_size, end[1] - head_size)]
+    else:
+        end = (c - length, c)
+        head = [end, (end[0] + head_size, end[1] - head_size), (end[0] + head_size, end[1] + head_size)]
+    pygame.draw.polygon(surface, color, head)
+    pygame.draw.line(surface, color, (c, c), end, width)
+    
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert_alpha()
+    _arrow_cache[key] = (surface, center)
+    return surface, center
 
 class Founder:
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=random):
         self.x = x
         self.y = y
-        self.direction = random.choice(list(Direction))
+        # Random source for the starting direction and pivots (the random module or a random.Random)
+        self.rng = rng
+        self.direction = rng.choice(list(Direction))
         self.base_visibility = 1  # Base visibility without talking to users
         self.temporary_boost = 0  # Temporary visibility boost from talking to users
         self.max_visibility = 2   # Maximum visibility with boost
         
-        # Load founder image
-        self.original_image = pygame.image.load('alex.jpg')
-        # Scale the image to fit within a cell (slightly smaller than cell size)
+        # Load founder image, scaled to fit within a cell (slightly smaller than cell size).
+        # Images are cached, so creating more founders doesn't decode it again.
+        self.original_image = load_image('alex.jpg')
         self.founder_size = int(CELL_SIZE * 0.7)  # Make slightly smaller to fit with arrow
-        self.image = pygame.transform.scale(self.original_image, (self.founder_size, self.founder_size))
+        self.image = load_image('alex.jpg', (self.founder_size, self.founder_size))
         
         # Arrow properties
         self.arrow_length = int(CELL_SIZE * 0.4)
@@ -60,7 +105,7 @@ class Founder:
     def pivot(self):
         # Choose a random direction other than the current one
         possible_directions = [d for d in Direction if d != self.direction]
-        self.direction = random.choice(possible_directions)
+        self.direction = self.rng.choice(possible_directions)
     
     def build(self, maze):
         # Reset temporary visibility boost when ding
@@ -78,7 +123,7 @@ class Founder:
             new_x -= 1
         
         # Check if the new position is valid and not a wall
-        if (0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE and 
+        if (0 <= new_x < maze.shape[1] and 0 <= new_y < maze.shape[0] and 
             maze[new_y][new_x] != 1):  # 1 represents wall
             self.x, self.y = new_x, new_y
     
@@ -91,18 +136,32 @@ class Founder:
         pass
 
 class IdeaMaze:
-    def __init__(self):
+    def __init__(self, seed=None, layout=None):
+        # The game's own random source, so the game can be reproduced from its seed
+        # without touching the random module's global state
+        self.seed = seed if seed is not None else random.randrange(2**63)
+        self.rng = random.Random(self.seed)
+        
+        init_pygame()
         self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
         pygame.display.set_caption("The Idea Maze")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont(None, 24)
         self.large_font = pygame.font.SysFont(None, 72)
         
-        # Create the mazes
-        self.debug_maze, self.player_maze, self.pmf_pos, self.founder_pos = self.generate_maze()
+        # Create the mazes, or use a prepared layout (e.g. from a maze corpus) if given
+        if layout is None:
+            self.debug_maze, self.player_maze, self.pmf_pos, self.founder_pos = self.generate_maze()
+        else:
+            self.debug_maze = layout["maze"].copy()
+            self.player_maze = self.debug_maze.copy()
+            self.pmf_pos = layout["pmf_pos"]
+            self.founder_pos = layout["founder_pos"]
         
         # Create the founder
-        self.founder = Founder(self.founder_pos[0], self.founder_pos[1])
+        self.founder = Founder(self.founder_pos[0], self.founder_pos[1], self.rng)
+        if layout is not None:
+            self.founder.direction = Direction(layout["direction"])
         
         # Game state
         self.game_won = False
@@ -112,89 +171,46 @@ class IdeaMaze:
         self.ai_mode = False  # AI mode disabled by default
         
         # Keep track of which cells have been seen
-        self.visited_cells = np.zeros((GRID_SIZE, GRID_SIZE), dtype=bool)
+        self.visited_cells = np.zeros(self.debug_maze.shape, dtype=bool)
         # Mark cells around the founder as initially seen
         self.update_visited_cells()
     
     def update_visited_cells(self):
         # Mark all currently visible cells as visited
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
+        for y in range(self.visited_cells.shape[0]):
+            for x in range(self.visited_cells.shape[1]):
                 dx = abs(x - self.founder.x)
                 dy = abs(y - self.founder.y)
                 if dx <= self.founder.visibility and dy <= self.founder.visibility:
                     self.visited_cells[y][x] = True
     
     def generate_maze(self):
-        while True:
-            # Initialize empty maze
-            maze = np.zeros((GRID_SIZE, GRID_SIZE), dtype=int)
-            
-            # Randomly place walls (1/3 chance for each cell)
-            for y in range(GRID_SIZE):
-                for x in range(GRID_SIZE):
-                    if random.random() < 1/3:
-                        maze[y][x] = 1  # 1 represents wall
-            
-            # Find a valid starting position for the Founder (not on a wall)
-            valid_positions = []
-            for y in range(GRID_SIZE):
-                for x in range(GRID_SIZE):
-                    if maze[y][x] == 0:  # Empty space
-                        valid_positions.append((x, y))
-            
-            if not valid_positions:
-                continue  # Try again if no valid positions
-                
-            founder_x, founder_y = random.choice(valid_positions)
-            
-            # Place PMF at a position that's not visible on the first turn
-            # (more than 1 step away from the founder)
-            pmf_positions = []
-            for y in range(GRID_SIZE):
-                for x in range(GRID_SIZE):
-                    if maze[y][x] == 0 and max(abs(x - founder_x), abs(y - founder_y)) > 1:
-                        pmf_positions.append((x, y))
-            
-            if not pmf_positions:
-                continue  # Try again if no valid PMF positions
-                
-            pmf_x, pmf_y = random.choice(pmf_positions)
-            maze[pmf_y][pmf_x] = 2  # 2 represents PMF
-            
-            # Check if there's a valid path from Founder to PMF
-            if self.check_path(maze.copy(), (founder_x, founder_y), (pmf_x, pmf_y)):
-                # Create player maze (same as debug maze but with limited visibility)
-                player_maze = maze.copy()
-                return maze, player_maze, (pmf_x, pmf_y), (founder_x, founder_y)
+        maze, pmf_pos, founder_pos = generate_maze(rng=self.rng)
+        # Create player maze (same as debug maze but with limited visibility)
+        player_maze = maze.copy()
+        return maze, player_maze, pmf_pos, founder_pos
     
     def check_path(self, maze, start, end):
-        # BFS to check if there's a path from start to end
-        queue = [start]
-        visited = set([start])
-        
-        while queue:
-            x, y = queue.pop(0)
-            
-            if (x, y) == end:
-                return True
-            
-            for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
-                nx, ny = x + dx, y + dy
-                
-                if (0 <= nx < GRID_SIZE and 0 <= ny < GRID_SIZE and 
-                    maze[ny][nx] != 1 and (nx, ny) not in visited):
-                    queue.append((nx, ny))
-                    visited.add((nx, ny))
-        
-        return False
+        return check_path(maze, start, end)
+    
+    def view_origin(self):
+        """
+        Top left cell of the view, keeping the founder centered on mazes larger than the view
+        """
+        height, width = self.debug_maze.shape
+        origin_x = min(max(self.founder.x - GRID_SIZE // 2, 0), max(width - GRID_SIZE, 0))
+        origin_y = min(max(self.founder.y - GRID_SIZE // 2, 0), max(height - GRID_SIZE, 0))
+        return origin_x, origin_y
     
-    def draw_maze(self, maze, x_offset, is_player_view=False):
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
+    def draw_maze(self, maze, x_offset, is_player_view=False, origin=(0, 0)):
+        # origin is the maze cell shown in the top left corner, for mazes larger than the view
+        origin_x, origin_y = origin
+        for row in range(min(GRID_SIZE, maze.shape[0] - origin_y)):
+            for col in range(min(GRID_SIZE, maze.shape[1] - origin_x)):
+                x, y = origin_x + col, origin_y + row
                 rect = pygame.Rect(
-                    x * CELL_SIZE + x_offset,
-                    y * CELL_SIZE + MARGIN,
+                    col * CELL_SIZE + x_offset,
+                    row * CELL_SIZE + MARGIN,
                     CELL_SIZE,
                     CELL_SIZE
                 )
@@ -217,8 +233,8 @@ class IdeaMaze:
                         pygame.draw.rect(self.screen, LIGHT_GRAY, rect)
                         pmf_text = self.font.render("PMF", True, BLUE)
                         self.screen.blit(pmf_text, (
-                            x * CELL_SIZE + x_offset + CELL_SIZE//2 - pmf_text.get_width()//2,
-                            y * CELL_SIZE + MARGIN + CELL_SIZE//2 - pmf_text.get_height()//2
+                            rect.x + CELL_SIZE//2 - pmf_text.get_width()//2,
+                            rect.y + CELL_SIZE//2 - pmf_text.get_height()//2
                         ))
                     else:  # Empty space
                         pygame.draw.rect(self.screen, WHITE, rect)
@@ -228,8 +244,8 @@ class IdeaMaze:
                     pygame.draw.rect(self.screen, WHITE, rect)
                     pmf_text = self.font.render("PMF", True, BLUE)
                     self.screen.blit(pmf_text, (
-                        x * CELL_SIZE + x_offset + CELL_SIZE//2 - pmf_text.get_width()//2,
-                        y * CELL_SIZE + MARGIN + CELL_SIZE//2 - pmf_text.get_height()//2
+                        rect.x + CELL_SIZE//2 - pmf_text.get_width()//2,
+                        rect.y + CELL_SIZE//2 - pmf_text.get_height()//2
                     ))
                 else:  # Empty space
                     pygame.draw.rect(self.screen, WHITE, rect)
@@ -237,60 +253,26 @@ class IdeaMaze:
                 # Draw grid lines
                 pygame.draw.rect(self.screen, BLACK, rect, 1)
     
-    def draw_founder(self, x_offset):
+    def draw_founder(self, x_offset, origin=(0, 0)):
+        # Founder cell relative to the top left cell of the view
+        col = self.founder.x - origin[0]
+        row = self.founder.y - origin[1]
+        
         # Calculate position for the founder image
-        pos_x = self.founder.x * CELL_SIZE + x_offset + (CELL_SIZE - self.founder.founder_size) // 2
-        pos_y = self.founder.y * CELL_SIZE + MARGIN + (CELL_SIZE - self.founder.founder_size) // 2
+        pos_x = col * CELL_SIZE + x_offset + (CELL_SIZE - self.founder.founder_size) // 2
+        pos_y = row * CELL_SIZE + MARGIN + (CELL_SIZE - self.founder.founder_size) // 2
         
         # Draw the founder image (unrotated)
         self.screen.blit(self.founder.image, (pos_x, pos_y))
         
         # Calculate center of the founder for arrow placement
-        center_x = self.founder.x * CELL_SIZE + x_offset + CELL_SIZE // 2
-        center_y = self.founder.y * CELL_SIZE + MARGIN + CELL_SIZE // 2
-        
-        # Calculate arrow start and end points based on direction
-        start_x, start_y = center_x, center_y
-        
-        if self.founder.direction == Direction.UP:
-            end_x = center_x
-            end_y = center_y - self.founder.arrow_length
-            # Draw arrowhead
-            pygame.draw.polygon(self.screen, RED, [
-                (end_x, end_y),
-                (end_x - self.founder.arrow_head_size, end_y + self.founder.arrow_head_size),
-                (end_x + self.founder.arrow_head_size, end_y + self.founder.arrow_head_size)
-            ])
-        elif self.founder.direction == Direction.RIGHT:
-            end_x = center_x + self.founder.arrow_length
-            end_y = center_y
-            # Draw arrowhead
-            pygame.draw.polygon(self.screen, RED, [
-                (end_x, end_y),
-                (end_x - self.founder.arrow_head_size, end_y - self.founder.arrow_head_size),
-                (end_x - self.founder.arrow_head_size, end_y + self.founder.arrow_head_size)
-            ])
-        elif self.founder.direction == Direction.DOWN:
-            end_x = center_x
-            end_y = center_y + self.founder.arrow_length
-            # Draw arrowhead
-            pygame.draw.polygon(self.screen, RED, [
-                (end_x, end_y),
-                (end_x - self.founder.arrow_head_size, end_y - self.founder.arrow_head_size),
-                (end_x + self.founder.arrow_head_size, end_y - self.founder.arrow_head_size)
-            ])
-        elif self.founder.direction == Direction.LEFT:
-            end_x = center_x - self.founder.arrow_length
-            end_y = center_y
-            # Draw arrowhead
-            pygame.draw.polygon(self.screen, RED, [
-                (end_x, end_y),
-                (end_x + self.founder.arrow_head_size, end_y - self.founder.arrow_head_size),
-                (end_x + self.founder.arrow_head_size, end_y + self.founder.arrow_head_size)
-            ])
+        center_x = col * CELL_SIZE + x_offset + CELL_SIZE // 2
+        center_y = row * CELL_SIZE + MARGIN + CELL_SIZE // 2
         
-        # Draw the arrow line
-        pygame.draw.line(self.screen, RED, (start_x, start_y), (end_x, end_y), self.founder.arrow_width)
+        # Draw the pre-rendered arrow for the founder's direction
+        arrow, arrow_center = arrow_surface(self.founder.direction, self.founder.arrow_length,
+                                            self.founder.arrow_head_size, self.founder.arrow_width)
+        self.screen.blit(arrow, (center_x - arrow_center, center_y - arrow_center))
     
     def draw_runway(self):
         # Draw runway counter in bottom right
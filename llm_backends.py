@@ -0,0 +1,221 @@
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from types import SimpleNamespace
+import numpy as np
+from maze_core import Direction
+from policy_router import explore_action
+
+# Model used when none is given
+DEFAULT_MODEL = "gpt-4.1-2025-04-14"
+
+# Map symbols in AIPlayer prompts -> fog-masked map values (the Founder stands on an empty cell)
+MAP_VALUES = {"?": -1, ".": 0, "#": 1, "P": 2, "F": 0}
+
+
+def message_tokens(messages):
+    """
+    Rough token count of chat messages: 4 characters per token, 85 per low detail image
+    """
+    tokens = 0
+    for message in messages:
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            tokens += len(content) // 4
+        else:
+            tokens += sum(len(part.get("text", "")) // 4 if part.get("type") == "text" else 85 for part in content)
+    return tokens
+
+
+class LLMBackend:
+    """
+    Where an LLM player's chat completion requests go. create(**request) takes
+    the arguments of the OpenAI chat completions API and returns an object
+    with choices[0].message.content (and usage, if known); acreate is the same
+    for asyncio code, by default running create in a worker thread.
+    with_options returns a copy with client options such as timeout or
+    max_retries, which backends without them ignore.
+    """
+    model = DEFAULT_MODEL
+
+    def create(self, **request):
+        raise NotImplementedError
+
+    async def acreate(self, **request):
+        return await asyncio.to_thread(self.create, **request)
+
+    def with_options(self, **options):
+        return self
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    The OpenAI API, or any OpenAI-compatible server (vLLM, llama.cpp, Ollama,
+    mock_llm_server.py, ...) at base_url. Clients are created on first use,
+    so a backend that is never called needs no key.
+    """
+    def __init__(self, model=DEFAULT_MODEL, base_url=None, api_key=None, **client_options):
+        self.model = model
+        self.base_url = base_url
+        # Local servers usually don't check the key, but the client insists on one
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY") or ("unused" if base_url else None)
+        self.client_options = client_options
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url, **self.client_options)
+        return self._client
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, **self.client_options)
+        return self._async_client
+
+    def create(self, **request):
+        return self.client.chat.completions.create(**request)
+
+    async def acreate(self, **request):
+        return await self.async_client.chat.completions.create(**request)
+
+    def with_options(self, **options):
+        return OpenAIBackend(self.model, self.base_url, self.api_key, **dict(self.client_options, **options))
+
+
+def constant_latency(seconds):
+    return lambda rng: seconds
+
+
+def lognormal_latency(median, sigma=0.5):
+    """
+    Latencies with the given median and a long tail, like real API round trips
+    """
+    return lambda rng: rng.lognormvariate(np.log(median), sigma)
+
+
+def read_prompt_state(text):
+    """
+    (visible map, founder position, direction) from an AIPlayer text prompt, or None if it has no map
+    """
+    position = re.search(r"- Position: \((\d+), (\d+)\)", text)
+    direction = re.search(r"- Direction: (\w+)", text)
+    map_start = re.search(r"Visible Map \(.*\):\n", text)
+    if not (position and direction and map_start):
+        return None
+    rows = []
+    for line in text[map_start.end():].split("\n"):
+        if not line.strip():
+            break
+        rows.append([MAP_VALUES.get(symbol, -1) for symbol in line.strip()])
+    return (np.array(rows, dtype=np.int8), (int(position.group(1)), int(position.group(2))),
+            Direction[direction.group(1)].value)
+
+
+class StubBackend(LLMBackend):
+    """
+    In-process stand-in for an LLM, for tests, load tests and benchmarks
+    without network or keys. policy picks each action:
+    - "heuristic": policy_router.explore_action on the map in the prompt
+    - "random": a random allowed action
+    - a list of actions, played in order and then repeated
+    - a callable(request) -> action
+    Replies follow the request's JSON schema (an object, or a one-action plan)
+    or are the bare action name. latency is seconds per reply or a
+    callable(rng) -> seconds, such as lognormal_latency(0.5).
+    """
+    model = "stub"
+
+    def __init__(self, policy="heuristic", latency=0.0, seed=None):
+        self.policy = policy
+        self.latency = latency if callable(latency) else constant_latency(latency)
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    @staticmethod
+    def allowed_actions(request):
+        """
+        Actions the request allows, from its JSON schema or else from the prompt
+        """
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            field = next(iter(response_format["json_schema"]["schema"]["properties"].values()))
+            return field["items"]["enum"] if field.get("type") == "array" else field["enum"]
+        actions = ["pivot", "build", "talk_to_user", "fundraise"]
+        text = json.dumps(request.get("messages", []))
+        if "pivot_to_up" in text:
+            actions += ["build_until_blocked", "pivot_to_up", "pivot_to_right", "pivot_to_down", "pivot_to_left",
+                        "talk_then_build"]
+        return actions
+
+    def choose(self, request, allowed):
+        if callable(self.policy):
+            return self.policy(request)
+        if isinstance(self.policy, (list, tuple)):
+            return self.policy[self.calls % len(self.policy)]
+        if self.policy == "heuristic":
+            content = request["messages"][-1]["content"]
+            state = read_prompt_state(content) if isinstance(content, str) else None
+            if state is not None:
+                action = explore_action(*state, macro_actions="pivot_to_up" in allowed)
+                if action in allowed:
+                    return action
+            return "build"
+        return self.rng.choice(allowed)
+
+    def reply(self, request):
+        """
+        Response object for a request, without the latency
+        """
+        allowed = self.allowed_actions(request)
+        action = self.choose(request, allowed)
+        self.calls += 1
+
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            name, field = next(iter(response_format["json_schema"]["schema"]["properties"].items()))
+            content = json.dumps({name: [action] if field.get("type") == "array" else action})
+        else:
+            content = action
+
+        prompt_tokens = message_tokens(request.get("messages", []))
+        completion_tokens = len(content) // 4 + 1
+        return SimpleNamespace(
+            model=self.model,
+            choices=[SimpleNamespace(index=0, finish_reason="stop",
+                                     message=SimpleNamespace(role="assistant", content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens))
+
+    def create(self, **request):
+        delay = self.latency(self.rng)
+        if delay > 0:
+            time.sleep(delay)
+        return self.reply(request)
+
+    async def acreate(self, **request):
+        delay = self.latency(self.rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.reply(request)
+
+
+def backend_from_env():
+    """
+    Backend set by environment variables: LLM_BACKEND=stub for a StubBackend
+    (STUB_POLICY, STUB_LATENCY median seconds, STUB_LATENCY_SIGMA for a
+    lognormal spread), otherwise an OpenAIBackend for LLM_MODEL at LLM_BASE_URL
+    """
+    if os.environ.get("LLM_BACKEND", "openai").lower() == "stub":
+        median = float(os.environ.get("STUB_LATENCY", "0"))
+        sigma = float(os.environ.get("STUB_LATENCY_SIGMA", "0"))
+        latency = lognormal_latency(median, sigma) if median > 0 and sigma > 0 else median
+        return StubBackend(os.environ.get("STUB_POLICY", "heuristic"), latency)
+    return OpenAIBackend(os.environ.get("LLM_MODEL", DEFAULT_MODEL), os.environ.get("LLM_BASE_URL"))
@@ -0,0 +1,102 @@
+import random
+from collections import deque
+from enum import Enum
+import numpy as np
+
+# Game rules and constants shared by the pygame game, the headless engine and
+# the tools built on it. Nothing here imports pygame, so headless code can
+# import this without loading SDL.
+
+# Constants
+GRID_SIZE = 12
+CELL_SIZE = 50
+MARGIN = 50
+WINDOW_WIDTH = GRID_SIZE * CELL_SIZE * 2 + MARGIN * 3
+WINDOW_HEIGHT = GRID_SIZE * CELL_SIZE + MARGIN * 2 + 100  # Extra space for buttons
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GRAY = (200, 200, 200)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+YELLOW = (255, 255, 0)
+DARK_RED = (180, 0, 0)
+LIGHT_GRAY = (230, 230, 230)
+DARK_GRAY = (120, 120, 120)  # Darker gray for previously seen walls
+
+# Direction enum
+class Direction(Enum):
+    UP = 0
+    RIGHT = 1
+    DOWN = 2
+    LEFT = 3
+
+def generate_maze(rng=random, grid_size=GRID_SIZE, wall_probability=1/3):
+    """
+    Random maze with a path from the Founder to PMF.
+    rng is anything with random() and choice(), such as the random module or a random.Random.
+    Returns (maze, pmf_pos, founder_pos).
+    """
+    while True:
+        # Initialize empty maze
+        maze = np.zeros((grid_size, grid_size), dtype=int)
+        
+        # Randomly place walls (1/3 chance for each cell by default)
+        for y in range(grid_size):
+            for x in range(grid_size):
+                if rng.random() < wall_probability:
+                    maze[y][x] = 1  # 1 represents wall
+        
+        # Find a valid starting position for the Founder (not on a wall)
+        valid_positions = []
+        for y in range(grid_size):
+            for x in range(grid_size):
+                if maze[y][x] == 0:  # Empty space
+                    valid_positions.append((x, y))
+        
+        if not valid_positions:
+            continue  # Try again if no valid positions
+            
+        founder_x, founder_y = rng.choice(valid_positions)
+        
+        # Place PMF at a position that's not visible on the first turn
+        # (more than 1 step away from the founder)
+        pmf_positions = []
+        for y in range(grid_size):
+            for x in range(grid_size):
+                if maze[y][x] == 0 and max(abs(x - founder_x), abs(y - founder_y)) > 1:
+                    pmf_positions.append((x, y))
+        
+        if not pmf_positions:
+            continue  # Try again if no valid PMF positions
+            
+        pmf_x, pmf_y = rng.choice(pmf_positions)
+        maze[pmf_y][pmf_x] = 2  # 2 represents PMF
+        
+        # Check if there's a valid path from Founder to PMF
+        if check_path(maze, (founder_x, founder_y), (pmf_x, pmf_y)):
+            return maze, (pmf_x, pmf_y), (founder_x, founder_y)
+
+def check_path(maze, start, end):
+    # BFS to check if there's a path from start to end
+    height, width = maze.shape
+    queue = deque([start])
+    visited = set([start])
+    
+    while queue:
+        x, y = queue.popleft()
+        
+        if (x, y) == end:
+            return True
+        
+        for dx, dy in [(0, -1), (1, 0), (0, 1), (-1, 0)]:
+            nx, ny = x + dx, y + dy
+            
+            if (0 <= nx < width and 0 <= ny < height and 
+                maze[ny][nx] != 1 and (nx, ny) not in visited):
+                queue.append((nx, ny))
+                visited.add((nx, ny))
+    
+    return False
@@ -0,0 +1,159 @@
+import argparse
+import random
+import struct
+import numpy as np
+from maze_core import GRID_SIZE, generate_maze
+from headless_maze import DIRECTION_DELTAS, distance_map
+
+MAGIC = b"PMFC"
+VERSION = 1
+
+# Flag bits in the file header
+HAS_OPTIMAL_COST = 1
+
+# File header: magic, version, flags, grid size, number of mazes, wall probability, seed.
+# Padded to HEADER_SIZE bytes, followed by one fixed-size record per maze.
+HEADER = struct.Struct("<4sBBHIdQ")
+HEADER_SIZE = 64
+
+
+def record_dtype(grid_size):
+    """
+    Fixed-stride record for one maze: walls as packed bits, founder start,
+    PMF position, starting direction and the optimal-cost label (NaN if not computed)
+    """
+    return np.dtype([
+        ("walls", np.uint8, ((grid_size * grid_size + 7) // 8,)),
+        ("founder", "<u2", (2,)),
+        ("pmf", "<u2", (2,)),
+        ("direction", np.uint8),
+        ("optimal_cost", "<f4"),
+    ])
+
+
+def optimal_cost(maze, pmf_pos, tolerance=1e-4, max_iterations=100_000):
+    """
+    Expected months to reach PMF when the whole maze is known, for every
+    (direction, y, x). Pivot picks one of the other three directions at
+    random, so this is value iteration over build/pivot rather than a plain
+    shortest path. Cells that can't reach PMF are inf.
+    """
+    height, width = maze.shape
+    reachable = distance_map(maze, pmf_pos) >= 0
+    ys, xs = np.mgrid[0:height, 0:width]
+
+    # Cell reached by building in each direction (staying put when blocked)
+    targets = []
+    for dx, dy in DIRECTION_DELTAS:
+        nx, ny = xs + dx, ys + dy
+        inside = (nx >= 0) & (nx < width) & (ny >= 0) & (ny < height)
+        nx, ny = np.where(inside, nx, xs), np.where(inside, ny, ys)
+        blocked = maze[ny, nx] == 1
+        targets.append((np.where(blocked, ys, ny), np.where(blocked, xs, nx)))
+
+    values = np.zeros((4, height, width))
+    for _ in range(max_iterations):
+        build = np.stack([1 + values[d][targets[d]] for d in range(4)])
+        pivot = 1 + (values.sum(axis=0) - values) / 3
+        new_values = np.minimum(build, pivot)
+        new_values[:, ~reachable] = 0
+        new_values[:, pmf_pos[1], pmf_pos[0]] = 0
+        converged = np.abs(new_values - values).max() < tolerance
+        values = new_values
+        if converged:
+            break
+
+    values[:, ~reachable] = np.inf
+    return values
+
+
+def build_corpus(path, count, seed=0, grid_size=GRID_SIZE, wall_probability=1/3, label=False):
+    """
+    Generate count validated mazes and write them to a corpus file.
+    The same seed always gives the same corpus.
+    """
+    rng = random.Random(seed)
+    flags = HAS_OPTIMAL_COST if label else 0
+    dtype = record_dtype(grid_size)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, grid_size, count, wall_probability, seed).ljust(HEADER_SIZE, b"\0"))
+
+    records = np.memmap(path, dtype=dtype, mode="r+", offset=HEADER_SIZE, shape=(count,))
+    for i in range(count):
+        maze, pmf_pos, founder_pos = generate_maze(rng, grid_size, wall_probability)
+        direction = rng.randrange(4)
+        records[i]["walls"] = np.packbits(maze == 1)
+        records[i]["founder"] = founder_pos
+        records[i]["pmf"] = pmf_pos
+        records[i]["direction"] = direction
+        records[i]["optimal_cost"] = (optimal_cost(maze, pmf_pos)[direction, founder_pos[1], founder_pos[0]]
+                                      if label else np.nan)
+    records.flush()
+
+
+class MazeCorpus:
+    """
+    Memory-mapped corpus of validated mazes. Loading maze #i only reads its
+    record, so IdeaMaze(layout=corpus[i]) costs nothing to generate.
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+        (magic, version, flags, self.grid_size, self.count,
+         self.wall_probability, self.seed) = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} maze corpus")
+
+        self.has_optimal_cost = bool(flags & HAS_OPTIMAL_COST)
+        self.records = np.memmap(path, dtype=record_dtype(self.grid_size), mode="r",
+                                 offset=HEADER_SIZE, shape=(self.count,))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        """
+        Layout of maze #i, as accepted by IdeaMaze, DumbPlayer and HeadlessMaze.from_layout
+        """
+        record = self.records[i]
+        cells = self.grid_size * self.grid_size
+        maze = np.unpackbits(record["walls"])[:cells].reshape(self.grid_size, self.grid_size).astype(int)
+        pmf_pos = (int(record["pmf"][0]), int(record["pmf"][1]))
+        maze[pmf_pos[1]][pmf_pos[0]] = 2
+
+        return {
+            "maze": maze,
+            "founder_pos": (int(record["founder"][0]), int(record["founder"][1])),
+            "pmf_pos": pmf_pos,
+            "direction": int(record["direction"]),
+            "optimal_cost": float(record["optimal_cost"]) if self.has_optimal_cost else None,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or inspect a maze corpus")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="generate a new corpus")
+    build_parser.add_argument("path")
+    build_parser.add_argument("--count", type=int, default=1000)
+    build_parser.add_argument("--seed", type=int, default=0)
+    build_parser.add_argument("--grid-size", type=int, default=GRID_SIZE)
+    build_parser.add_argument("--wall-probability", type=float, default=1/3)
+    build_parser.add_argument("--label", action="store_true", help="store the optimal expected months for each maze")
+
+    info_parser = subparsers.add_parser("info", help="summarize an existing corpus")
+    info_parser.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build_corpus(args.path, args.count, args.seed, args.grid_size, args.wall_probability, args.label)
+        print(f"Wrote {args.count} mazes to {args.path}")
+    else:
+        corpus = MazeCorpus(args.path)
+        print(f"{len(corpus)} mazes of {corpus.grid_size}x{corpus.grid_size}, "
+              f"wall probability {corpus.wall_probability:.3f}, seed {corpus.seed}")
+        if corpus.has_optimal_cost:
+            costs = corpus.records["optimal_cost"]
+            print(f"Optimal cost: mean {np.mean(costs):.1f} months, max {np.max(costs):.1f} months")
@@ -0,0 +1,133 @@
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ai_player import DumbPlayer
+from headless_maze import ACTIONS
+from mcts_search import search
+
+logger = logging.getLogger(__name__)
+
+
+class MCTSPlayer(DumbPlayer):
+    """
+    A player that runs Monte Carlo tree search over sampled completions of the
+    fog of war, spreading rollouts over a pool of worker processes
+    """
+    def __init__(self, time_budget=1.0, iteration_budget=None, num_workers=None,
+                 num_determinizations=32, exploration=0.3, rollout_depth=20, layout=None, pool=None):
+        super().__init__(layout)
+
+        # Search budgets per move: seconds and/or total rollouts across all workers
+        self.time_budget = time_budget
+        self.iteration_budget = iteration_budget
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.num_determinizations = num_determinizations
+        self.exploration = exploration
+        self.rollout_depth = rollout_depth
+        # Worker processes: a pool shared with other players if given, else our own
+        self.owns_pool = pool is None
+        self.pool = pool if pool is not None else ProcessPoolExecutor(max_workers=self.num_workers)
+
+        # Search statistics for the last move and the whole game
+        self.last_search_stats = None
+        self.total_rollouts = 0
+        self.total_search_time = 0.0
+
+        # Set a more descriptive UI label
+        self.player_label = "MCTS Player"
+
+    @classmethod
+    def from_env(cls, layout=None, **options):
+        """
+        Create a player with search budgets from MCTS_TIME_BUDGET, MCTS_ITERATIONS and MCTS_WORKERS.
+        options are passed on to the constructor and take precedence.
+        """
+        iterations = os.environ.get("MCTS_ITERATIONS")
+        workers = os.environ.get("MCTS_WORKERS")
+        return cls(**dict({
+            "time_budget": float(os.environ.get("MCTS_TIME_BUDGET", "1.0")),
+            "iteration_budget": int(iterations) if iterations else None,
+            "num_workers": int(workers) if workers else None,
+            "layout": layout,
+        }, **options))
+
+    def close(self):
+        """
+        Shut down the worker processes, unless the pool is shared with other players
+        """
+        if self.owns_pool and self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+        self.pool = None
+
+    def __del__(self):
+        # Games that are abandoned before they end never call close
+        if getattr(self, "pool", None) is not None:
+            self.close()
+
+    def get_observation(self, game_state):
+        """
+        Everything the search needs, built only from what the player can see
+        """
+        return {
+            "visible_map": np.array(game_state["visible_map"], dtype=np.int8),
+            "visited_cells": self.game.visited_cells.copy(),
+            "founder_position": game_state["founder_position"],
+            "direction": self.game.founder.direction.value,
+            "runway": game_state["runway"],
+            "temporary_boost": 1 if game_state["temporary_boost"] else 0,
+        }
+
+    def choose_action(self, game_state):
+        """
+        Choose the most visited root action after searching in parallel
+        """
+        observation = self.get_observation(game_state)
+        worker_budget = None
+        if self.iteration_budget is not None:
+            worker_budget = max(self.iteration_budget // self.num_workers, 1)
+
+        start_time = time.perf_counter()
+        futures = [
+            self.pool.submit(search, observation, self.time_budget, worker_budget,
+                             random.getrandbits(32), self.num_determinizations,
+                             self.exploration, self.rollout_depth)
+            for _ in range(self.num_workers)
+        ]
+
+        visits = [0] * len(ACTIONS)
+        value_sums = [0.0] * len(ACTIONS)
+        rollouts = 0
+        for future in futures:
+            worker_visits, worker_values, worker_rollouts = future.result()
+            for i in range(len(ACTIONS)):
+                visits[i] += worker_visits[i]
+                value_sums[i] += worker_values[i]
+            rollouts += worker_rollouts
+        elapsed = time.perf_counter() - start_time
+
+        best = max(range(len(ACTIONS)), key=lambda i: visits[i])
+        action = ACTIONS[best]
+
+        self.total_rollouts += rollouts
+        self.total_search_time += elapsed
+        self.last_search_stats = {
+            "rollouts": rollouts,
+            "seconds": elapsed,
+            "rollouts_per_second": rollouts / elapsed if elapsed > 0 else 0.0,
+            "visits": dict(zip(ACTIONS, visits)),
+            "values": {a: value_sums[i] / visits[i] if visits[i] else 0.0
+                       for i, a in enumerate(ACTIONS)},
+        }
+        logger.info("MCTS chose %s: %d rollouts in %.2fs (%.0f rollouts/sec)", action,
+                    rollouts, elapsed, self.last_search_stats["rollouts_per_second"])
+
+        self.current_action = action
+        return action
+
+
+if __name__ == "__main__":
+    player = MCTSPlayer.from_env()
+    player.run()
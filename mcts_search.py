@@ -0,0 +1,182 @@
+import math
+import random
+import time
+import numpy as np
+from maze_core import check_path
+from headless_maze import ACTIONS, HeadlessMaze, distance_map
+
+# Monte Carlo tree search over sampled completions of the fog of war, as run
+# by MCTSPlayer's worker processes. Nothing here imports pygame, so workers
+# started with spawn or forkserver only load SDL if the main script does.
+
+# Chance that an unseen cell is a wall, same as IdeaMaze.generate_maze
+WALL_PROBABILITY = 1/3
+
+# Fundraise leaves the game exactly as it was minus a month, so it is never
+# worth searching
+SEARCH_ACTIONS = ["pivot", "build", "talk_to_user"]
+
+
+def sample_determinization(visible_map, founder_pos, rng, max_attempts=100):
+    """
+    Fill in the unseen (-1) cells of the visible map with a plausible maze.
+    The result agrees with everything already seen and always has a path
+    from the founder to PMF, as check_path requires for generated mazes.
+    Returns (maze, pmf_pos).
+    """
+    unknown = visible_map == -1
+    unknown_cells = [(int(x), int(y)) for y, x in zip(*np.nonzero(unknown))]
+    seen_pmf = np.argwhere(visible_map == 2)
+    # Numpy generator seeded from our own RNG so a seed reproduces the same worlds
+    np_rng = np.random.default_rng(rng.getrandbits(32))
+
+    for _ in range(max_attempts):
+        maze = visible_map.astype(int)
+        walls = np_rng.random(visible_map.shape) < WALL_PROBABILITY
+        maze[unknown] = np.where(walls[unknown], 1, 0)
+
+        if len(seen_pmf):
+            pmf_y, pmf_x = seen_pmf[0]
+            pmf_pos = (int(pmf_x), int(pmf_y))
+        else:
+            # PMF hasn't been seen yet so it must be on one of the unseen empty cells
+            candidates = [(x, y) for x, y in unknown_cells if maze[y][x] == 0]
+            if not candidates:
+                continue
+            pmf_pos = rng.choice(candidates)
+            maze[pmf_pos[1]][pmf_pos[0]] = 2
+
+        if check_path(maze, founder_pos, pmf_pos):
+            return maze, pmf_pos
+
+    # Fall back to a completion without any unseen walls, which only adds paths
+    maze = visible_map.astype(int)
+    maze[unknown] = 0
+    if len(seen_pmf):
+        pmf_y, pmf_x = seen_pmf[0]
+        return maze, (int(pmf_x), int(pmf_y))
+    distances = distance_map(maze, founder_pos)
+    candidates = [(x, y) for x, y in unknown_cells if distances[y, x] > 0] or unknown_cells
+    pmf_pos = rng.choice(candidates)
+    maze[pmf_pos[1]][pmf_pos[0]] = 2
+    return maze, pmf_pos
+
+
+class _Node:
+    """
+    Open-loop search tree node, identified by the action sequence from the root.
+    Pivot is random, so the state is re-simulated on every visit instead of stored.
+    """
+    __slots__ = ("children", "visits", "value_sum")
+
+    def __init__(self):
+        self.children = {}
+        self.visits = 0
+        self.value_sum = 0.0
+
+
+def rollout_policy(world, distances, rng, epsilon=0.1):
+    """
+    Cheap default policy for the sampled world: build when that gets closer
+    to PMF, pivot otherwise, with a little randomness mixed in
+    """
+    if rng.random() < epsilon:
+        return rng.choice(ACTIONS)
+    cell = world.front_cell()
+    if cell is not None and 0 <= distances[cell[1], cell[0]] < distances[world.y, world.x]:
+        return "build"
+    return "pivot"
+
+
+def evaluate(world, distances, root_runway, root_distance, scale):
+    """
+    Value of a simulated state in [0, 1], measured as months wasted compared
+    to walking straight to PMF from the root. Comparing against the root of
+    the same sampled world keeps far-away PMFs from drowning out the effect
+    of the action being searched. Running out of runway is worth nothing.
+    """
+    if world.game_over and not world.game_won:
+        return 0.0
+    distance = distances[world.y, world.x]
+    if distance < 0:
+        return 0.0
+    months_used = root_runway - world.runway
+    wasted = months_used + distance - root_distance
+    return min(max(1.0 - wasted / scale, 0.0), 1.0)
+
+
+def search(observation, time_budget=None, iteration_budget=None, seed=None,
+           num_determinizations=32, exploration=0.3, rollout_depth=20):
+    """
+    Run determinized open-loop UCT from one observation.
+    Each iteration plays out in one of num_determinizations sampled worlds.
+    Stops at whichever of time_budget (seconds) or iteration_budget comes first.
+    Returns (visits, value_sums, rollouts) with one entry per action in ACTIONS.
+    """
+    if time_budget is None and iteration_budget is None:
+        raise ValueError("search needs a time_budget or an iteration_budget")
+
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    founder_pos = observation["founder_position"]
+
+    # Sample the plausible worlds up front and reuse them across iterations
+    worlds = []
+    for _ in range(num_determinizations):
+        maze, pmf_pos = sample_determinization(observation["visible_map"], founder_pos, rng)
+        world = HeadlessMaze(maze, founder_pos, pmf_pos, observation["direction"],
+                             observation["runway"], observation["visited_cells"], rng)
+        world.temporary_boost = observation["temporary_boost"]
+        distances = distance_map(maze, pmf_pos)
+        worlds.append((world, distances, distances[founder_pos[1], founder_pos[0]]))
+
+    root = _Node()
+    rollouts = 0
+    while True:
+        if iteration_budget is not None and rollouts >= iteration_budget:
+            break
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+        base_world, distances, root_distance = worlds[rollouts % num_determinizations]
+        world = base_world.copy()
+        node = root
+        path = [root]
+
+        # Selection and expansion
+        while not world.done:
+            untried = [a for a in SEARCH_ACTIONS if a not in node.children]
+            if untried:
+                action = rng.choice(untried)
+                node.children[action] = _Node()
+                node = node.children[action]
+                world.step(action)
+                path.append(node)
+                break
+
+            log_visits = math.log(node.visits)
+            action, node = max(
+                node.children.items(),
+                key=lambda item: item[1].value_sum / item[1].visits
+                + exploration * math.sqrt(log_visits / item[1].visits)
+            )
+            world.step(action)
+            path.append(node)
+
+        # Simulation
+        depth = 0
+        while not world.done and depth < rollout_depth:
+            world.step(rollout_policy(world, distances, rng))
+            depth += 1
+        value = evaluate(world, distances, observation["runway"], root_distance, 2 * rollout_depth)
+
+        # Backpropagation
+        for visited_node in path:
+            visited_node.visits += 1
+            visited_node.value_sum += value
+        rollouts += 1
+
+    visits = [root.children[a].visits if a in root.children else 0 for a in ACTIONS]
+    value_sums = [root.children[a].value_sum if a in root.children else 0.0 for a in ACTIONS]
+    return visits, value_sums, rollouts
+
@@ -0,0 +1,152 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from llm_backends import message_tokens
+from rate_limit import TokenBucket
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Local stand-in for an OpenAI-compatible chat completions endpoint that
+    enforces per-minute request and token limits like the real API: requests
+    over the limit get a 429 with a Retry-After header. Replies pick a random
+    allowed value from the request's JSON schema (or "build" for plain text)
+    after a fixed latency. Point the OpenAI client at it with OPENAI_BASE_URL.
+    """
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 8000), requests_per_minute=None, tokens_per_minute=None,
+                 latency=0.0, seed=None):
+        super().__init__(address, MockLLMHandler)
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.stats = {"served": 0, "rate_limited": 0, "tokens": 0}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def admit(self, tokens):
+        """
+        Take the request from the limits, or return the seconds to wait if it is over them
+        """
+        with self.lock:
+            waits = []
+            if self.requests is not None:
+                waits.append(self.requests.wait_time(1))
+            if self.tokens is not None:
+                waits.append(self.tokens.wait_time(tokens))
+            wait = max(waits, default=0.0)
+            if wait > 0:
+                self.stats["rate_limited"] += 1
+                return wait
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+            return None
+
+    def reply(self, request):
+        """
+        Reply text for a chat completion request
+        """
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") != "json_schema":
+            return "build"
+        reply = {}
+        for name, field in response_format["json_schema"]["schema"]["properties"].items():
+            if field.get("type") == "array":
+                reply[name] = [self.rng.choice(field["items"]["enum"]) for _ in range(self.rng.randint(1, 4))]
+            else:
+                reply[name] = self.rng.choice(field["enum"])
+        return json.dumps(reply)
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        return dict(self.stats, requests_per_minute=self.stats["served"] * 60 / elapsed if elapsed else 0.0)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    def send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        # GET /stats for the counts so far
+        if self.path.rstrip("/").endswith("/stats"):
+            self.send_json(200, self.server.summary())
+        else:
+            self.send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": "Not found"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        prompt_tokens = message_tokens(request.get("messages", []))
+
+        wait = self.server.admit(prompt_tokens + request.get("max_tokens", 0))
+        if wait is not None:
+            self.send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                           [("Retry-After", str(math.ceil(wait * 10) / 10))])
+            return
+
+        time.sleep(self.server.latency)
+        content = self.server.reply(request)
+        completion_tokens = len(content) // 4 + 1
+        with self.server.lock:
+            self.server.stats["served"] += 1
+            self.server.stats["tokens"] += prompt_tokens + completion_tokens
+        self.send_json(200, {
+            "id": f"chatcmpl-mock-{self.server.stats['served']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_in_background(**kwargs):
+    """
+    Start a MockLLMServer on a daemon thread and return it (call shutdown() to stop)
+    """
+    server = MockLLMServer(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate-limited mock OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--rpm", type=float, help="requests per minute (default: unlimited)")
+    parser.add_argument("--tpm", type=float, help="tokens per minute (default: unlimited)")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per reply")
+    args = parser.parse_args()
+
+    server = MockLLMServer((args.host, args.port), args.rpm, args.tpm, args.latency)
+    print(f"Serving on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(server.summary()))
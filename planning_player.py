@@ -0,0 +1,170 @@
+import json
+import re
+from collections import deque
+from ai_player import AIPlayer
+from headless_maze import DIRECTION_DELTAS
+from maze_core import Direction
+
+# Most actions the model may plan in one reply
+PLAN_LENGTH = 8
+
+
+class PlanningAIPlayer(AIPlayer):
+    """
+    AIPlayer that asks the model for a plan of several actions and plays it
+    without calling the model again, until the plan runs out or cells
+    revealed since it was made contradict it: a wall appears on a cell the
+    plan builds through, or PMF comes into view. A plain pivot also ends the
+    plan, since its direction is random.
+    """
+    # Most steps are played from the plan, so a prefetched request would rarely be used
+    can_prefetch = False
+
+    def __init__(self, layout=None, plan_length=PLAN_LENGTH, macro_actions=True, structured_output=True,
+                 router=False, **options):
+        super().__init__(layout, macro_actions, structured_output, router, **options)
+        self.plan_length = plan_length
+        # Enough tokens for a list of plan_length action names
+        self.max_tokens = 8 * plan_length + 4
+
+        # Actions still to play, and what was known when the plan was made
+        self.plan = deque()
+        self.plan_known_cells = None
+        self.plan_saw_pmf = False
+        # Why the last plan ended, counted once the model is asked for a new one
+        self.replan_reason = None
+        self.plan_stats = {"requests": 0, "planned_actions": 0, "cached_actions": 0,
+                           "replans": {"exhausted": 0, "pivot": 0, "wall": 0, "pmf": 0}}
+
+        self.player_label = "OpenAI Planning Player"
+
+    def response_instructions(self):
+        actions = self.prompt_actions()
+        action_names = ", ".join(f'"{action}"' for action in actions)
+        if self.macro_actions:
+            pivot_note = "Use pivot_to_<direction> rather than pivot: pivot faces a random way, so the plan ends after it."
+        else:
+            pivot_note = "Pivot faces a random way, so the plan ends after a pivot."
+        if self.structured_output:
+            reply_format = f"""You must respond with a plan: a JSON object such as {{"plan": ["pivot_to_up", "build"]}} listing the next actions to take, in order, up to {self.plan_length} of these actions: {action_names}."""
+        else:
+            reply_format = f"""You must respond with a plan: the next actions to take, in order, as a comma-separated list of up to {self.plan_length} of these actions: {action_names}."""
+        return f"""{reply_format}
+The plan is followed until it runs out or newly revealed cells contradict it (a wall appears where it builds, or PMF comes into view), and then you will be asked for a new plan.
+{pivot_note}""" + ("" if self.structured_output else "\nDo not include any explanation, just the action names.")
+
+    def choice_instructions(self):
+        if self.structured_output:
+            return "Plan your next actions from the list above."
+        return "Plan your next actions from the list above. Respond with only the comma-separated action names."
+
+    def response_format(self):
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "plan",
+                "strict": True,
+                "schema": {
+                    "type": "object",
+                    "properties": {"plan": {"type": "array", "items": {"type": "string", "enum": self.prompt_actions()}}},
+                    "required": ["plan"],
+                    "additionalProperties": False,
+                },
+            },
+        }
+
+    def plan_conflict(self):
+        """
+        Why the remaining plan can't be played, or None if it still holds
+        """
+        if not self.plan:
+            return "exhausted"
+        if self.current_action == "pivot":
+            return "pivot"
+
+        visible = self.get_visible_array()
+        if not self.plan_saw_pmf and (visible == 2).any():
+            return "pmf"
+
+        # Walk the rest of the plan over the map: a cell it builds through that was
+        # unexplored when planning and is now a known wall breaks the plan
+        founder = self.game.founder
+        x, y, direction = founder.x, founder.y, founder.direction.value
+        height, width = visible.shape
+        for action in self.plan:
+            if action in ("build", "talk_then_build"):
+                dx, dy = DIRECTION_DELTAS[direction]
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height):
+                    continue
+                if visible[ny, nx] == 1:
+                    if not self.plan_known_cells[ny, nx]:
+                        return "wall"
+                    # Building into a wall the model could already see is its own choice
+                    continue
+                x, y = nx, ny
+            elif action.startswith("pivot_to_"):
+                direction = Direction[action[len("pivot_to_"):].upper()].value
+            elif action in ("pivot", "build_until_blocked"):
+                # Where the founder ends up can't be predicted past these
+                break
+        return None
+
+    def completion_request(self, messages, temperature=None):
+        # Called once for every request sent, in an ensemble too
+        self.plan_stats["requests"] += 1
+        return super().completion_request(messages, temperature)
+
+    def parse_plan(self, action_text):
+        """
+        Valid action names in the model's reply, in order, at most plan_length of them,
+        and whether the reply followed the response format
+        """
+        valid_actions = set(self.prompt_actions())
+        if self.structured_output:
+            try:
+                plan = json.loads(action_text)["plan"]
+            except (ValueError, KeyError, TypeError):
+                plan = None
+            if isinstance(plan, list) and plan and all(action in valid_actions for action in plan):
+                return plan[:self.plan_length], True
+        words = re.findall(r"[a-z_]+", (action_text or "").lower())
+        plan = [word for word in words if word in valid_actions][:self.plan_length]
+        return plan, not self.structured_output and plan == words[:self.plan_length]
+
+    def vote_key(self, action_text):
+        # Ensemble replies vote for whole plans
+        return tuple(self.parse_plan(action_text)[0]) or None
+
+    def parse_action(self, action_text):
+        plan, valid = self.parse_plan(action_text)
+        if not plan:
+            return super().parse_action(action_text)
+        self.plan = deque(plan[1:])
+        self.plan_stats["planned_actions"] += len(plan)
+        return self.count_response("valid" if valid else "repaired", plan[0])
+
+    def choose_action(self, game_state):
+        """
+        Play the next planned action, asking the model for a new plan if there is none
+        """
+        reason = self.plan_conflict()
+        if reason is None:
+            action = self.plan.popleft()
+            self.plan_stats["cached_actions"] += 1
+            self.last_latency = None
+            self.current_action = action
+            return action
+
+        # The router or the circuit breaker's fallback may play this step instead of the
+        # model, so the plan ends now but the replan only counts once a request is sent
+        if self.replan_reason is None:
+            self.replan_reason = reason
+        self.plan.clear()
+        return super().choose_action(game_state)
+
+    def start_request(self, game_state):
+        self.plan_stats["replans"][self.replan_reason or "exhausted"] += 1
+        self.replan_reason = None
+        self.plan_known_cells = self.game.visited_cells.copy()
+        self.plan_saw_pmf = bool((self.get_visible_array() == 2).any())
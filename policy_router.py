@@ -0,0 +1,101 @@
+import numpy as np
+from headless_maze import DIRECTION_DELTAS, distance_map
+from maze_core import Direction
+
+
+def known_maze(visible):
+    """
+    Fog-masked map with unexplored cells treated as walls, so paths only use known cells
+    """
+    return np.where(visible < 0, 1, visible)
+
+
+def frontier_mask(visible):
+    """
+    Known open cells (empty or PMF) next to at least one unexplored cell
+    """
+    unknown = np.pad(visible < 0, 1)
+    next_to_unknown = unknown[:-2, 1:-1] | unknown[2:, 1:-1] | unknown[1:-1, :-2] | unknown[1:-1, 2:]
+    return (visible >= 0) & (visible != 1) & next_to_unknown
+
+
+def move_towards(target, direction, macro_actions=True):
+    """
+    Action that heads the founder in direction target (both Direction values)
+    """
+    if target == direction:
+        return "build"
+    if macro_actions:
+        return "pivot_to_" + Direction(target).name.lower()
+    return "pivot"
+
+
+def open_neighbours(maze, x, y):
+    """
+    (direction, x, y) of each open cell next to (x, y)
+    """
+    height, width = maze.shape
+    for direction, (dx, dy) in enumerate(DIRECTION_DELTAS):
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < width and 0 <= ny < height and maze[ny, nx] != 1:
+            yield direction, nx, ny
+
+
+def obvious_action(visible, position, direction, macro_actions=True):
+    """
+    Action for a state with an obvious move, as (action, rule), or None when
+    the state is ambiguous and should go to the model. The rules are:
+    pmf_path, when PMF can be reached through known cells, follows the
+    shortest such path; one_way_out, when all unexplored cells the founder
+    can reach lie the same way (a dead end, or facing a wall in a corridor),
+    heads that way.
+    """
+    maze = known_maze(np.asarray(visible))
+    x, y = position
+    direction = getattr(direction, "value", direction)
+
+    pmf = np.argwhere(maze == 2)
+    if len(pmf):
+        distances = distance_map(maze, (int(pmf[0][1]), int(pmf[0][0])))
+        if distances[y, x] > 0:
+            # Neighbours one step closer to PMF, keeping the current direction if it is one
+            steps = [d for d, nx, ny in open_neighbours(maze, x, y) if distances[ny, nx] == distances[y, x] - 1]
+            target = direction if direction in steps else steps[0]
+            return move_towards(target, direction, macro_actions), "pmf_path"
+
+    # Which ways out of the founder's cell lead to any unexplored cell
+    frontier = frontier_mask(np.asarray(visible))
+    blocked = maze.copy()
+    blocked[y, x] = 1
+    ways = [d for d, nx, ny in open_neighbours(maze, x, y) if frontier[distance_map(blocked, (nx, ny)) >= 0].any()]
+    if len(ways) == 1:
+        return move_towards(ways[0], direction, macro_actions), "one_way_out"
+    return None
+
+
+def explore_action(visible, position, direction, macro_actions=True):
+    """
+    Simple local policy: the obvious action if there is one, otherwise head
+    for the nearest unexplored cell (keeping the current direction on ties),
+    or talk to users to see further when no unexplored cell can be reached
+    """
+    routed = obvious_action(visible, position, direction, macro_actions)
+    if routed is not None:
+        return routed[0]
+
+    visible = np.asarray(visible)
+    maze = known_maze(visible)
+    x, y = position
+    direction = getattr(direction, "value", direction)
+    distances = distance_map(maze, (x, y))
+    reachable = frontier_mask(visible) & (distances > 0)
+    if not reachable.any():
+        return "talk_to_user"
+
+    nearest = distances[reachable].min()
+    steps = set()
+    for ty, tx in np.argwhere(reachable & (distances == nearest)):
+        to_target = distance_map(maze, (int(tx), int(ty)))
+        steps.update(d for d, nx, ny in open_neighbours(maze, x, y) if to_target[ny, nx] == nearest - 1)
+    target = direction if direction in steps else min(steps)
+    return move_towards(target, direction, macro_actions)
@@ -0,0 +1,215 @@
+import os
+import csv
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# Histogram bucket upper bounds in seconds, from sub-millisecond engine calls to slow LLM round trips
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Phases recorded by the players, in the order they happen in a step
+PHASES = [
+    "observation",       # building the game state for the player
+    "decision",          # choose_action as a whole
+    "decision.route",    # LLM players with a router: checking for an obvious move
+    "decision.prompt",   # LLM players: building the request messages
+    "decision.queue",    # LLM players: waiting for a rate limit shared with other games
+    "decision.network",  # LLM players: the API round trip
+    "decision.parse",    # LLM players: turning the response into an action
+    "execute_action",
+    "visibility",        # update_visited_cells, inside execute_action
+    "render",            # drawing a frame
+    "flip",              # pygame.display.flip
+]
+
+
+class _Phase:
+    """
+    Context manager timing one phase
+    """
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, as Prometheus expects
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class StepProfiler:
+    """
+    Records how long each phase of a game step takes.
+    Time a phase with `with profiler.phase("render"):` or record a measured
+    duration with profiler.record(name, seconds). Durations of the same phase
+    within a step add up, and end_step() hands the step's timings to every sink.
+    Per-phase call counters and histograms cover the whole run.
+    """
+    enabled = True
+
+    def __init__(self, sinks=(), buckets=DEFAULT_BUCKETS):
+        self.sinks = list(sinks)
+        self.buckets = buckets
+        self.current = {}
+        self.steps = 0
+        self.histograms = {}
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def record(self, name, seconds):
+        self.current[name] = self.current.get(name, 0.0) + seconds
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def end_step(self):
+        timings, self.current = self.current, {}
+        for sink in self.sinks:
+            sink.write_step(self.steps, timings, self)
+        self.steps += 1
+
+    def summary(self):
+        """
+        Calls, total and mean seconds for every phase seen so far
+        """
+        return {name: {"calls": h.count, "total": h.sum, "mean": h.sum / h.count}
+                for name, h in self.histograms.items()}
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close(self)
+
+
+class NullProfiler:
+    """
+    Profiler that records nothing, used when profiling is off.
+    phase() returns one shared no-op context manager, so instrumented code
+    only pays for a method call.
+    """
+    enabled = False
+    _phase = nullcontext()
+
+    def phase(self, name):
+        return self._phase
+
+    def record(self, name, seconds):
+        pass
+
+    def end_step(self):
+        pass
+
+    def summary(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class MemorySink:
+    """
+    Keeps the last max_steps steps' timings in memory as (step, timings) pairs
+    """
+    def __init__(self, max_steps=None):
+        self.steps = deque(maxlen=max_steps)
+
+    def write_step(self, step, timings, profiler):
+        self.steps.append((step, timings))
+
+    def close(self, profiler):
+        pass
+
+
+class CSVSink:
+    """
+    Writes one row per step: the step number, then seconds spent in each phase (blank if not run)
+    """
+    def __init__(self, path, phases=PHASES):
+        self.phases = list(phases)
+        self.file = open(path, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["step"] + self.phases)
+
+    def write_step(self, step, timings, profiler):
+        self.writer.writerow([step] + [f"{timings[p]:.6f}" if p in timings else "" for p in self.phases])
+
+    def close(self, profiler):
+        self.file.close()
+
+
+class PrometheusSink:
+    """
+    Writes counters and histograms in the Prometheus text format to path, for
+    node_exporter's textfile collector. The file is rewritten at most every
+    interval seconds (and on close), replacing it atomically.
+    """
+    def __init__(self, path, interval=5.0, prefix="idea_maze"):
+        self.path = path
+        self.interval = interval
+        self.prefix = prefix
+        self.last_write = 0.0
+
+    def write_step(self, step, timings, profiler):
+        now = time.monotonic()
+        if now - self.last_write >= self.interval:
+            self.write(profiler)
+            self.last_write = now
+
+    def write(self, profiler):
+        name = f"{self.prefix}_phase_seconds"
+        lines = [
+            f"# HELP {self.prefix}_steps_total Game steps taken.",
+            f"# TYPE {self.prefix}_steps_total counter",
+            f"{self.prefix}_steps_total {profiler.steps}",
+            f"# HELP {name} Time spent in each phase of a game step.",
+            f"# TYPE {name} histogram",
+        ]
+        for phase, histogram in profiler.histograms.items():
+            for bound, count in histogram.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{phase="{phase}",le="{le}"}} {count}')
+            lines.append(f'{name}_sum{{phase="{phase}"}} {histogram.sum}')
+            lines.append(f'{name}_count{{phase="{phase}"}} {histogram.count}')
+
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary_path, self.path)
+
+    def close(self, profiler):
+        self.write(profiler)
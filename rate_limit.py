@@ -0,0 +1,239 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+# HTTP statuses meaning the server is over its limit or overloaded, worth retrying later
+OVERLOAD_STATUS = (429, 503, 529)
+
+
+def overload_delay(error):
+    """
+    Seconds the server asked to wait before retrying (0 if it didn't say) when
+    error is a rate-limit or overload response, None for any other error
+    """
+    if getattr(error, "status_code", None) not in OVERLOAD_STATUS:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    """
+    Holds up to capacity units, refilled continuously at rate units per second.
+    Not thread-safe on its own; RateLimitScheduler guards it with its lock.
+    """
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.level = capacity
+        self.updated = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """
+        Seconds until amount units are available (amounts over capacity wait for a full bucket)
+        """
+        self.refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / self.rate
+
+    def take(self, amount):
+        """
+        Remove amount units; a negative amount gives units back. The level may go below zero.
+        """
+        self.refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimitScheduler:
+    """
+    Shares one API rate limit between many games (one per thread). Requests
+    wait for both a request bucket and a token bucket, sized from the
+    provider's per-minute limits, so bursts queue locally instead of failing.
+    Waiting games take turns: the game served longest ago goes next. When the
+    server still answers 429 or overloaded, every game pauses for Retry-After
+    (or an exponential backoff with jitter) and the request is retried.
+    """
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, max_retries=6, backoff=1.0,
+                 max_backoff=60.0, clock=time.monotonic):
+        self.requests = TokenBucket(requests_per_minute / 60, requests_per_minute, clock) \
+            if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute / 60, tokens_per_minute, clock) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+
+        self.condition = threading.Condition()
+        # Game -> its waiting tickets, in arrival order
+        self.waiting = {}
+        # Game -> turn number of its last request, for round-robin order
+        self.last_served = {}
+        self.turn = 0
+        self.paused_until = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "failed": 0, "tokens": 0, "wait_seconds": 0.0,
+                      "backoff_seconds": 0.0, "per_game": {}}
+
+    @classmethod
+    def from_env(cls):
+        """
+        Scheduler for the limits in RATE_LIMIT_RPM and RATE_LIMIT_TPM (per minute, unset for no limit)
+        """
+        rpm = os.environ.get("RATE_LIMIT_RPM")
+        tpm = os.environ.get("RATE_LIMIT_TPM")
+        return cls(float(rpm) if rpm else None, float(tpm) if tpm else None)
+
+    def next_ticket(self):
+        game = min(self.waiting, key=lambda g: self.last_served.get(g, -1))
+        return self.waiting[game][0]
+
+    def wait_time(self, tokens):
+        waits = [self.paused_until - self.clock()]
+        if self.requests is not None:
+            waits.append(self.requests.wait_time(1))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_time(tokens))
+        return max(waits)
+
+    def acquire(self, game, tokens, cancelled=None):
+        """
+        Block until it is this game's turn and the buckets hold a request and
+        tokens, and return the seconds waited. If the threading.Event
+        cancelled is set first, leave the queue without taking anything and
+        return None.
+        """
+        start = self.clock()
+        ticket = object()
+        with self.condition:
+            self.waiting.setdefault(game, []).append(ticket)
+            while True:
+                if cancelled is not None and cancelled.is_set():
+                    self.waiting[game].remove(ticket)
+                    if not self.waiting[game]:
+                        del self.waiting[game]
+                    self.condition.notify_all()
+                    return None
+                if self.next_ticket() is ticket:
+                    wait = self.wait_time(tokens)
+                    if wait <= 0:
+                        break
+                    self.condition.wait(wait)
+                else:
+                    self.condition.wait()
+
+            self.waiting[game].pop(0)
+            if not self.waiting[game]:
+                del self.waiting[game]
+            self.turn += 1
+            self.last_served[game] = self.turn
+            if self.requests is not None:
+                self.requests.take(1)
+            if self.tokens is not None:
+                self.tokens.take(tokens)
+
+            waited = self.clock() - start
+            self.stats["wait_seconds"] += waited
+            game_stats = self.stats["per_game"].setdefault(game, {"requests": 0, "wait_seconds": 0.0})
+            game_stats["requests"] += 1
+            game_stats["wait_seconds"] += waited
+            self.condition.notify_all()
+        return waited
+
+    async def aacquire(self, game, tokens):
+        """
+        acquire for asyncio code, waiting in a worker thread. A task cancelled
+        while it waits leaves the queue without using the rate limit.
+        """
+        cancelled = threading.Event()
+        try:
+            return await asyncio.to_thread(self.acquire, game, tokens, cancelled)
+        except asyncio.CancelledError:
+            cancelled.set()
+            with self.condition:
+                self.condition.notify_all()
+            raise
+
+    def pause(self, attempt, retry_after):
+        """
+        Stop all games for Retry-After seconds, or an exponential backoff if the server didn't say
+        """
+        delay = retry_after or min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        with self.condition:
+            self.paused_until = max(self.paused_until, self.clock() + delay)
+            self.stats["backoff_seconds"] += delay
+            self.condition.notify_all()
+
+    def call(self, game, send, tokens=1):
+        """
+        Run send() for game once the rate limit allows, retrying on 429 and
+        overload responses. tokens is the estimated cost of the request; when
+        the response reports its usage, the token bucket is corrected to match.
+        Returns the response and the seconds spent waiting for the rate limit
+        (for turns, tokens and pauses after 429s), which isn't network time.
+        """
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += self.acquire(game, tokens)
+            try:
+                response = send()
+            except Exception as e:
+                retry_after = self.retry_delay(e, attempt)
+                if retry_after is None:
+                    raise
+                self.pause(attempt, retry_after)
+                continue
+            self.count_usage(response, tokens)
+            return response, waited
+
+    async def acall(self, game, send, tokens=1):
+        """
+        call for asyncio code, with send a coroutine function. Cancelling the
+        task while it waits for its turn frees its place in the queue; once
+        sent, a request counts against the limit like any other.
+        """
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += await self.aacquire(game, tokens)
+            try:
+                response = await send()
+            except Exception as e:
+                retry_after = self.retry_delay(e, attempt)
+                if retry_after is None:
+                    raise
+                self.pause(attempt, retry_after)
+                continue
+            self.count_usage(response, tokens)
+            return response, waited
+
+    def retry_delay(self, error, attempt):
+        """
+        Retry-After seconds (0 if unknown) when a failed request should be retried, else None
+        """
+        retry_after = overload_delay(error)
+        with self.condition:
+            if retry_after is None or attempt == self.max_retries:
+                self.stats["failed"] += 1
+                return None
+            self.stats["throttled"] += 1
+        return retry_after
+
+    def count_usage(self, response, tokens):
+        """
+        Count a sent request, correcting the token bucket with the usage the response reports
+        """
+        used = getattr(getattr(response, "usage", None), "total_tokens", None) or tokens
+        with self.condition:
+            if self.tokens is not None and used != tokens:
+                self.tokens.take(used - tokens)
+            self.stats["requests"] += 1
+            self.stats["tokens"] += used
@@ -0,0 +1,274 @@
+import os
+import struct
+import time
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so use one writer per archive there
+    fcntl = None
+from headless_maze import ACTIONS, DIRECTION_DELTAS
+
+# Binary replay format
+#
+# An archive is a file of episodes written back to back, plus a sidecar
+# "<archive>.idx" file holding the byte offset of every episode so any
+# episode can be found without scanning. Each episode is laid out as:
+#
+#   header      HEADER
+#   walls       packed bits, one per cell (np.packbits of maze == 1)
+#   actions     one byte per step: bits 0-1 action, bits 2-3 direction after it
+#   keyframes   KEYFRAME every keyframe_interval steps, starting at step 0
+#   timestamps  float32 seconds since the episode started, if HAS_TIMESTAMPS
+#   latencies   float32 seconds spent choosing each action (NaN if unknown), if HAS_LATENCY
+#
+# The direction after each action is stored so a random Pivot replays exactly.
+# Founder state at any step is the nearest keyframe plus at most
+# keyframe_interval - 1 actions, so seeking costs the same anywhere in a game.
+
+ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+
+MAGIC = b"PMFR"
+VERSION = 1
+
+# Flag bits in the episode header
+HAS_TIMESTAMPS = 1
+HAS_LATENCY = 2
+
+# Episode header: magic, version, flags, width, height, keyframe interval, seed,
+# founder x/y, PMF x/y, starting direction, starting boost, starting runway, number of steps
+HEADER = struct.Struct("<4sBBHHHQHHHHBBHI")
+
+# Keyframe: founder x, y, direction and temporary boost
+KEYFRAME = struct.Struct("<HHBB")
+
+# Offsets into the archive are stored in a sidecar index file as uint64
+INDEX_SUFFIX = ".idx"
+
+DEFAULT_KEYFRAME_INTERVAL = 64
+
+
+def encode_action(action, direction):
+    return ACTION_CODES[action] | (direction << 2)
+
+
+def decode_action(code):
+    return ACTIONS[code & 3], (code >> 2) & 3
+
+
+class ReplayWriter:
+    """
+    Records one episode and appends it to a replay archive when closed.
+    Steps are buffered in memory (a few bytes each) because the header
+    needs the final number of steps. Any number of writers, in any number
+    of processes, can append to the same archive: each episode and its
+    index entry are appended together under an exclusive lock on the archive.
+    """
+    def __init__(self, path, maze, founder_pos, pmf_pos, direction, runway, seed=0, temporary_boost=0,
+                 record_timestamps=True, record_latency=False,
+                 keyframe_interval=DEFAULT_KEYFRAME_INTERVAL):
+        self.path = path
+        self.walls = np.asarray(maze) == 1
+        self.founder_pos = founder_pos
+        self.pmf_pos = pmf_pos
+        self.direction = getattr(direction, "value", direction)
+        self.runway = runway
+        self.temporary_boost = temporary_boost
+        self.seed = seed % 2**64
+        self.record_timestamps = record_timestamps
+        self.record_latency = record_latency
+        self.keyframe_interval = keyframe_interval
+
+        self.actions = bytearray()
+        self.keyframes = bytearray(KEYFRAME.pack(founder_pos[0], founder_pos[1], self.direction, temporary_boost))
+        self.timestamps = []
+        self.latencies = []
+        self.start_time = time.perf_counter()
+        self.closed = False
+
+    @classmethod
+    def from_game(cls, path, game, **kwargs):
+        """
+        Start recording an IdeaMaze game from its current state
+        """
+        return cls(path, game.debug_maze, (game.founder.x, game.founder.y), game.pmf_pos,
+                   game.founder.direction, game.runway, getattr(game, "seed", 0),
+                   game.founder.temporary_boost, **kwargs)
+
+    def record(self, action, founder, latency=None):
+        """
+        Record an action after it was executed. founder is anything with
+        x, y, direction and temporary_boost (a Founder or a HeadlessMaze).
+        """
+        direction = getattr(founder.direction, "value", founder.direction)
+        self.actions.append(encode_action(action, direction))
+        if len(self.actions) % self.keyframe_interval == 0:
+            self.keyframes += KEYFRAME.pack(founder.x, founder.y, direction, founder.temporary_boost)
+        if self.record_timestamps:
+            self.timestamps.append(time.perf_counter() - self.start_time)
+        if self.record_latency:
+            self.latencies.append(float("nan") if latency is None else latency)
+
+    def close(self):
+        """
+        Append the episode to the archive and its offset to the index
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        height, width = self.walls.shape
+        flags = (HAS_TIMESTAMPS if self.record_timestamps else 0) | (HAS_LATENCY if self.record_latency else 0)
+        header = HEADER.pack(MAGIC, VERSION, flags, width, height, self.keyframe_interval, self.seed,
+                             self.founder_pos[0], self.founder_pos[1], self.pmf_pos[0], self.pmf_pos[1],
+                             self.direction, self.temporary_boost, self.runway, len(self.actions))
+
+        with open(self.path, "ab") as f:
+            # Held until the index entry is written too, so another writer can't append in between
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(header)
+            f.write(np.packbits(self.walls).tobytes())
+            f.write(self.actions)
+            f.write(self.keyframes)
+            if self.record_timestamps:
+                f.write(np.asarray(self.timestamps, dtype="<f4").tobytes())
+            if self.record_latency:
+                f.write(np.asarray(self.latencies, dtype="<f4").tobytes())
+            f.flush()
+
+            with open(self.path + INDEX_SUFFIX, "ab") as index:
+                index.write(struct.pack("<Q", offset))
+
+
+class Replay:
+    """
+    One recorded episode. Arrays are views into the memory-mapped archive,
+    so opening an episode reads only its header.
+    """
+    def __init__(self, data, offset):
+        (magic, version, flags, self.width, self.height, self.keyframe_interval, self.seed,
+         founder_x, founder_y, pmf_x, pmf_y, self.start_direction, start_boost,
+         self.start_runway, self.num_steps) = HEADER.unpack_from(data, offset)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a version {VERSION} replay episode at offset {offset}")
+
+        self.founder_pos = (founder_x, founder_y)
+        self.pmf_pos = (pmf_x, pmf_y)
+
+        position = offset + HEADER.size
+        wall_bytes = (self.width * self.height + 7) // 8
+        self.walls = np.unpackbits(data[position:position + wall_bytes])[:self.width * self.height]
+        self.walls = self.walls.reshape(self.height, self.width).astype(bool)
+        position += wall_bytes
+
+        self.actions = data[position:position + self.num_steps]
+        position += self.num_steps
+
+        num_keyframes = self.num_steps // self.keyframe_interval + 1
+        self.keyframes = data[position:position + num_keyframes * KEYFRAME.size]
+        position += num_keyframes * KEYFRAME.size
+
+        self.timestamps = None
+        if flags & HAS_TIMESTAMPS:
+            self.timestamps = data[position:position + 4 * self.num_steps].view("<f4")
+            position += 4 * self.num_steps
+
+        self.latencies = None
+        if flags & HAS_LATENCY:
+            self.latencies = data[position:position + 4 * self.num_steps].view("<f4")
+            position += 4 * self.num_steps
+
+        self.end = position
+
+    @property
+    def maze(self):
+        """
+        Maze in the same encoding as IdeaMaze.debug_maze (0 empty, 1 wall, 2 PMF)
+        """
+        maze = self.walls.astype(int)
+        maze[self.pmf_pos[1]][self.pmf_pos[0]] = 2
+        return maze
+
+    def action(self, step):
+        """
+        Name of the action taken at step (0-based)
+        """
+        return decode_action(self.actions[step])[0]
+
+    def apply_action(self, code, x, y, boost):
+        """
+        Founder state after one recorded action.
+        Returns (action, x, y, direction, temporary_boost).
+        """
+        action, direction = decode_action(code)
+        if action == "build":
+            boost = 0
+            dx, dy = DIRECTION_DELTAS[direction]
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height and not self.walls[ny, nx]:
+                x, y = nx, ny
+        elif action == "talk_to_user":
+            boost = 1
+        return action, x, y, direction, boost
+
+    def state_at(self, step):
+        """
+        Founder state after `step` actions, found from the nearest keyframe.
+        Returns a dict with x, y, direction, temporary_boost, runway, game_won and game_over.
+        """
+        if not 0 <= step <= self.num_steps:
+            raise IndexError(f"step {step} out of range 0..{self.num_steps}")
+
+        keyframe = step // self.keyframe_interval
+        x, y, direction, boost = KEYFRAME.unpack_from(self.keyframes, keyframe * KEYFRAME.size)
+
+        for code in self.actions[keyframe * self.keyframe_interval:step]:
+            action, x, y, direction, boost = self.apply_action(code, x, y, boost)
+
+        runway = self.start_runway - step
+        return {
+            "x": x,
+            "y": y,
+            "direction": direction,
+            "temporary_boost": boost,
+            "runway": runway,
+            "game_won": (x, y) == self.pmf_pos,
+            "game_over": runway <= 0,
+        }
+
+
+class ReplayArchive:
+    """
+    Read-only access to every episode in a replay archive, by episode number
+    """
+    def __init__(self, path):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+
+        index_path = path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            self.offsets = np.fromfile(index_path, dtype="<u8")
+        else:
+            self.offsets = self.rebuild_index()
+
+    def rebuild_index(self):
+        """
+        Find every episode by walking the headers, for archives without an index file
+        """
+        offsets = []
+        position = 0
+        while position < len(self.data):
+            offsets.append(position)
+            position = Replay(self.data, position).end
+        offsets = np.asarray(offsets, dtype="<u8")
+        offsets.tofile(self.path + INDEX_SUFFIX)
+        return offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, episode):
+        return Replay(self.data, int(self.offsets[episode]))
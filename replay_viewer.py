@@ -0,0 +1,269 @@
+import sys
+import time
+import pygame
+import numpy as np
+from idea_maze import (IdeaMaze, Founder, init_pygame, Direction, GRID_SIZE, CELL_SIZE, MARGIN,
+                       WINDOW_WIDTH, WINDOW_HEIGHT, WHITE, BLACK, GRAY, BLUE, GREEN, RED)
+from maze_core import DARK_GRAY
+from replay_log import ReplayArchive
+
+
+class ReplayViewer(IdeaMaze):
+    """
+    Plays back a recorded game with play/pause/step/scrub controls.
+    Any step is rebuilt from the nearest keyframe (founder state from the
+    replay, visited cells from keyframes built here) plus the few cells
+    revealed since, so scrubbing never re-simulates the game from the start.
+    Mazes larger than the view scroll to follow the founder.
+    """
+    def __init__(self, replay, visited_keyframe_interval=None):
+        # IdeaMaze.__init__ would generate a new maze, so set up only what drawing needs
+        init_pygame()
+        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("The Idea Maze - Replay")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont(None, 24)
+        self.large_font = pygame.font.SysFont(None, 72)
+
+        self.replay = replay
+        self.seed = replay.seed
+        self.debug_maze = replay.maze
+        self.player_maze = self.debug_maze
+        self.pmf_pos = replay.pmf_pos
+        self.founder = Founder(*replay.founder_pos)
+        self.debug_mode = True
+        self.ai_mode = True
+
+        # Playback state
+        self.step = None
+        self.playing = False
+        self.steps_per_second = 4
+        self.scrubbing = False
+
+        self.keyframe_interval = visited_keyframe_interval or replay.keyframe_interval
+        self.build_visited_keyframes()
+        self.seek(0)
+
+    def build_visited_keyframes(self):
+        """
+        One pass over the game to store the visited mask every keyframe_interval
+        steps (bit packed) and the square of cells each step revealed
+        """
+        replay = self.replay
+        visited = np.zeros((replay.height, replay.width), dtype=bool)
+        # Cells revealed by each step as (x, y, radius), radius 0 when nothing was revealed
+        self.reveals = np.zeros((replay.num_steps, 3), dtype=np.int32)
+
+        state = replay.state_at(0)
+        x, y, boost = state["x"], state["y"], state["temporary_boost"]
+        self.mark_visible(visited, x, y, 1 + boost)
+        self.visited_keyframes = [np.packbits(visited)]
+
+        for step, code in enumerate(replay.actions):
+            action, x, y, direction, boost = replay.apply_action(code, x, y, boost)
+            # Build and Talk to User update the visited cells, as in DumbPlayer.execute_action
+            if action in ("build", "talk_to_user"):
+                self.reveals[step] = (x, y, 1 + boost)
+                self.mark_visible(visited, x, y, 1 + boost)
+            if (step + 1) % self.keyframe_interval == 0:
+                self.visited_keyframes.append(np.packbits(visited))
+
+    @staticmethod
+    def mark_visible(visited, x, y, radius):
+        visited[max(y - radius, 0):y + radius + 1, max(x - radius, 0):x + radius + 1] = True
+
+    def visited_at(self, step):
+        """
+        Visited mask after `step` actions: nearest keyframe plus the reveals since
+        """
+        replay = self.replay
+        keyframe = step // self.keyframe_interval
+        cells = replay.width * replay.height
+        visited = np.unpackbits(self.visited_keyframes[keyframe])[:cells]
+        visited = visited.reshape(replay.height, replay.width).astype(bool)
+        for x, y, radius in self.reveals[keyframe * self.keyframe_interval:step]:
+            if radius:
+                self.mark_visible(visited, x, y, radius)
+        return visited
+
+    def seek(self, step):
+        """
+        Show the game as it was after `step` actions
+        """
+        step = min(max(step, 0), self.replay.num_steps)
+        if step == self.step:
+            return
+        self.step = step
+
+        state = self.replay.state_at(step)
+        self.founder.x = state["x"]
+        self.founder.y = state["y"]
+        self.founder.direction = Direction(state["direction"])
+        self.founder.temporary_boost = state["temporary_boost"]
+        self.runway = state["runway"]
+        self.game_won = state["game_won"]
+        self.game_over = state["game_over"]
+        self.visited_cells = self.visited_at(step)
+
+    def control_buttons(self):
+        """
+        Playback buttons as (label, key, rect)
+        """
+        button_width = 120
+        button_height = 40
+        button_margin = 15
+        labels = ["|<", "< Step", "Pause" if self.playing else "Play", "Step >", ">|"]
+        keys = ["start", "back", "play", "forward", "end"]
+
+        button_y = GRID_SIZE * CELL_SIZE + MARGIN * 2
+        total_buttons_width = len(labels) * button_width + (len(labels) - 1) * button_margin
+        button_start_x = (WINDOW_WIDTH - total_buttons_width) // 2
+
+        return [
+            (label, key, pygame.Rect(button_start_x + i * (button_width + button_margin),
+                                     button_y, button_width, button_height))
+            for i, (label, key) in enumerate(zip(labels, keys))
+        ]
+
+    def scrub_bar_rect(self):
+        return pygame.Rect(MARGIN, WINDOW_HEIGHT - 40, WINDOW_WIDTH - MARGIN * 2 - 200, 12)
+
+    def scrub_to(self, mouse_x):
+        bar = self.scrub_bar_rect()
+        fraction = min(max((mouse_x - bar.x) / bar.width, 0), 1)
+        self.seek(round(fraction * self.replay.num_steps))
+
+    def press(self, key):
+        if key == "start":
+            self.seek(0)
+        elif key == "back":
+            self.seek(self.step - 1)
+        elif key == "play":
+            # Restart from the beginning when play is pressed at the end
+            if not self.playing and self.step == self.replay.num_steps:
+                self.seek(0)
+            self.playing = not self.playing
+        elif key == "forward":
+            self.seek(self.step + 1)
+        elif key == "end":
+            self.seek(self.replay.num_steps)
+
+    def draw_controls(self):
+        for label, key, rect in self.control_buttons():
+            pygame.draw.rect(self.screen, GREEN if key == "play" and self.playing else BLUE, rect)
+            pygame.draw.rect(self.screen, BLACK, rect, 2)
+            text = self.font.render(label, True, WHITE)
+            self.screen.blit(text, (rect.centerx - text.get_width() // 2, rect.centery - text.get_height() // 2))
+
+        # Scrub bar with a handle at the current step
+        bar = self.scrub_bar_rect()
+        pygame.draw.rect(self.screen, GRAY, bar)
+        pygame.draw.rect(self.screen, BLACK, bar, 1)
+        fraction = self.step / self.replay.num_steps if self.replay.num_steps else 0
+        handle_x = bar.x + int(fraction * bar.width)
+        pygame.draw.rect(self.screen, RED, pygame.Rect(handle_x - 4, bar.y - 6, 8, bar.height + 12))
+
+        # Step counter, last action and playback speed above the bar
+        last_action = self.replay.action(self.step - 1).replace("_", " ").title() if self.step else "-"
+        status = f"Step {self.step}/{self.replay.num_steps}   Last Action: {last_action}   Speed: {self.steps_per_second:g} steps/s"
+        if self.game_won:
+            status += "   PMF reached!"
+        elif self.game_over:
+            status += "   Out of runway"
+        status_text = self.font.render(status, True, DARK_GRAY)
+        self.screen.blit(status_text, (bar.x, bar.y - status_text.get_height() - 10))
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_SPACE:
+                self.press("play")
+            elif event.key == pygame.K_RIGHT:
+                self.press("forward")
+            elif event.key == pygame.K_LEFT:
+                self.press("back")
+            elif event.key == pygame.K_HOME:
+                self.press("start")
+            elif event.key == pygame.K_END:
+                self.press("end")
+            elif event.key == pygame.K_PAGEUP:
+                self.seek(self.step - self.keyframe_interval)
+            elif event.key == pygame.K_PAGEDOWN:
+                self.seek(self.step + self.keyframe_interval)
+            elif event.key == pygame.K_UP:
+                self.steps_per_second *= 2
+            elif event.key == pygame.K_DOWN:
+                self.steps_per_second = max(self.steps_per_second / 2, 0.25)
+            elif event.key == pygame.K_d:
+                self.debug_mode = not self.debug_mode
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if self.scrub_bar_rect().inflate(0, 20).collidepoint(event.pos):
+                self.scrubbing = True
+                self.scrub_to(event.pos[0])
+            for label, key, rect in self.control_buttons():
+                if rect.collidepoint(event.pos):
+                    self.press(key)
+        elif event.type == pygame.MOUSEMOTION and self.scrubbing:
+            self.scrub_to(event.pos[0])
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.scrubbing = False
+
+    def draw(self):
+        self.screen.fill(WHITE)
+        origin = self.view_origin()
+
+        # Titles
+        debug_title = self.font.render("Debug View", True, BLACK)
+        self.screen.blit(debug_title, (MARGIN + GRID_SIZE * CELL_SIZE // 2 - debug_title.get_width() // 2, MARGIN // 2))
+        player_title = self.font.render(f"Replay (seed {self.seed})", True, BLACK)
+        self.screen.blit(player_title, (MARGIN * 2 + GRID_SIZE * CELL_SIZE * 3 // 2 - player_title.get_width() // 2, MARGIN // 2))
+
+        # Mazes and founder, only the cells inside the view are drawn
+        if self.debug_mode:
+            self.draw_maze(self.debug_maze, MARGIN, origin=origin)
+            self.draw_founder(MARGIN, origin)
+        else:
+            debug_rect = pygame.Rect(MARGIN, MARGIN, GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE)
+            pygame.draw.rect(self.screen, GRAY, debug_rect)
+        self.draw_maze(self.player_maze, MARGIN * 2 + GRID_SIZE * CELL_SIZE, True, origin)
+        self.draw_founder(MARGIN * 2 + GRID_SIZE * CELL_SIZE, origin)
+
+        self.draw_runway()
+        self.draw_visibility_indicator()
+        self.draw_controls()
+
+    def run(self):
+        last_advance = time.time()
+
+        while True:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+                self.handle_event(event)
+
+            # Advance playback by however many steps are due
+            now = time.time()
+            if self.playing and not self.scrubbing:
+                due = int((now - last_advance) * self.steps_per_second)
+                if due:
+                    self.seek(self.step + due)
+                    last_advance = now
+                    if self.step == self.replay.num_steps:
+                        self.playing = False
+            else:
+                last_advance = now
+
+            self.draw()
+            pygame.display.flip()
+            self.clock.tick(60)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python replay_viewer.py <replay archive> [game number]")
+        sys.exit(1)
+
+    archive = ReplayArchive(sys.argv[1])
+    episode = int(sys.argv[2]) if len(sys.argv) > 2 else len(archive) - 1
+    viewer = ReplayViewer(archive[episode])
+    viewer.run()
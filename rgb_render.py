@@ -0,0 +1,115 @@
+import numpy as np
+from maze_core import WHITE, BLACK, GRAY, BLUE, RED
+from headless_maze import DIRECTION_DELTAS
+
+# Pixels per cell in rendered frames
+RENDER_CELL_SIZE = 16
+
+# Cell colors by tile index: unexplored, empty, wall, PMF. A map cell's tile
+# is maze value + 1 where visited and 0 elsewhere.
+PALETTE = np.array([GRAY, WHITE, BLACK, BLUE], dtype=np.uint8)
+
+# Tiles and founder pixel offsets by cell size, built once per process
+_tiles = {}
+_founder_pixels = {}
+
+
+def cell_tiles(cell_size):
+    """
+    (4, cell_size, cell_size, 3) array holding one filled cell per palette color
+    """
+    tiles = _tiles.get(cell_size)
+    if tiles is None:
+        tiles = _tiles[cell_size] = np.ascontiguousarray(
+            np.broadcast_to(PALETTE[:, None, None, :], (len(PALETTE), cell_size, cell_size, 3)))
+    return tiles
+
+
+def founder_pixels(cell_size):
+    """
+    Pixel offsets within a cell for the founder: the red square (ys, xs), and
+    the black direction line for each direction as (4, n) arrays (ys, xs)
+    """
+    pixels = _founder_pixels.get(cell_size)
+    if pixels is None:
+        quarter = cell_size // 4
+        square_ys, square_xs = np.mgrid[quarter:cell_size - quarter, quarter:cell_size - quarter]
+        steps = np.arange(cell_size // 2)
+        center = cell_size // 2
+        line_ys = np.array([center + dy * steps for dx, dy in DIRECTION_DELTAS])
+        line_xs = np.array([center + dx * steps for dx, dy in DIRECTION_DELTAS])
+        pixels = _founder_pixels[cell_size] = (square_ys.ravel(), square_xs.ravel(), line_ys, line_xs)
+    return pixels
+
+
+def rasterize(cells, cell_size):
+    """
+    Paint tile indices of shape (..., H, W) into (..., H*cell_size, W*cell_size, 3) frames.
+    Gathering whole tiles and reshaping is far cheaper than upsampling pixel by pixel.
+    """
+    *batch, height, width = cells.shape
+    frames = cell_tiles(cell_size)[cells]  # (..., H, W, cell, cell, 3)
+    frames = np.moveaxis(frames, -4, -3)   # (..., H, cell, W, cell, 3)
+    return frames.reshape(*batch, height * cell_size, width * cell_size, 3)
+
+
+def draw_founders(frames, x, y, direction, cell_size):
+    """
+    Draw the founder into frames of shape (N, H, W, 3), one founder per frame
+    """
+    square_ys, square_xs, line_ys, line_xs = founder_pixels(cell_size)
+    index = np.arange(len(frames))[:, None]
+    top = (np.asarray(y) * cell_size)[:, None]
+    left = (np.asarray(x) * cell_size)[:, None]
+    direction = np.asarray(direction)
+    frames[index, top + square_ys, left + square_xs] = RED
+    frames[index, top + line_ys[direction], left + line_xs[direction]] = BLACK
+
+
+def render_player_views(maze, visited, x, y, direction, cell_size=RENDER_CELL_SIZE):
+    """
+    Player views of N games at once, as an (N, H*cell_size, W*cell_size, 3)
+    uint8 array. maze and visited are (N, H, W); x, y and direction are (N,).
+    """
+    cells = np.where(visited, np.asarray(maze) + 1, 0)
+    frames = rasterize(cells, cell_size)
+    draw_founders(frames, x, y, direction, cell_size)
+    return frames
+
+
+def render_player_view(maze, visited, x, y, direction, cell_size=RENDER_CELL_SIZE):
+    """
+    Player view as an (H*cell_size, W*cell_size, 3) uint8 array: unexplored
+    cells gray, empty white, walls black and PMF blue. The founder is a red
+    square with a line pointing in its direction.
+    """
+    direction = getattr(direction, "value", direction)
+    return render_player_views(np.asarray(maze)[None], np.asarray(visited)[None], [x], [y], [direction], cell_size)[0]
+
+
+def render_debug_view(maze, x, y, direction, cell_size=RENDER_CELL_SIZE):
+    """
+    Whole maze with no fog, drawn like render_player_view
+    """
+    return render_player_view(maze, np.ones(np.shape(maze), dtype=bool), x, y, direction, cell_size)
+
+
+def render_game(game, cell_size=RENDER_CELL_SIZE, debug=False):
+    """
+    Player (or debug) view of an IdeaMaze or HeadlessMaze as an RGB array, without a display
+    """
+    founder = getattr(game, "founder", game)
+    if debug:
+        maze = game.debug_maze if hasattr(game, "debug_maze") else game.maze
+        return render_debug_view(maze, founder.x, founder.y, founder.direction, cell_size)
+    maze = game.player_maze if hasattr(game, "player_maze") else game.maze
+    return render_player_view(maze, game.visited_cells, founder.x, founder.y, founder.direction, cell_size)
+
+
+def surface_to_array(surface):
+    """
+    Zero-copy (height, width, 3) view of a pygame surface's pixels, for frames
+    drawn by pygame itself. The surface stays locked while the view exists.
+    """
+    import pygame
+    return pygame.surfarray.pixels3d(surface).transpose(1, 0, 2)
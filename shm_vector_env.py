@@ -0,0 +1,178 @@
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+from maze_core import GRID_SIZE
+from headless_maze import ACTIONS, STARTING_RUNWAY
+from gym_env import IdeaMazeEnv, make_observation_space
+
+# Commands sent to workers. Each is one byte, and workers answer with one byte when done.
+STEP = b"s"
+RESET = b"r"
+CLOSE = b"c"
+
+
+def shared_layout(num_envs, grid_size):
+    """
+    Offsets and shapes of the arrays in the shared memory block:
+    observations first, then the per-env scalars, then the action buffer
+    """
+    arrays = [
+        ("map", np.int8, (num_envs, grid_size, grid_size)),
+        ("state", np.int16, (num_envs, 5)),
+        ("reward", np.float32, (num_envs,)),
+        ("terminated", np.bool_, (num_envs,)),
+        ("won", np.bool_, (num_envs,)),
+        ("seed", np.int64, (num_envs,)),
+        ("action", np.uint8, (num_envs,)),
+    ]
+    layout = {}
+    offset = 0
+    for name, dtype, shape in arrays:
+        # Keep every array aligned to 8 bytes
+        offset = (offset + 7) // 8 * 8
+        layout[name] = (offset, dtype, shape)
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, offset
+
+
+def shared_arrays(buffer, layout):
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            for name, (offset, dtype, shape) in layout.items()}
+
+
+def write_observation(arrays, i, world):
+    """
+    Write one game's observation straight into the shared arrays
+    """
+    out = arrays["map"][i]
+    out.fill(-1)
+    np.copyto(out, world.maze, where=world.visited_cells, casting="unsafe")
+    arrays["state"][i] = (world.x, world.y, world.direction, world.temporary_boost, world.runway)
+
+
+def worker(connection, shm_name, num_envs, grid_size, env_indices, env_kwargs):
+    """
+    Runs the games in env_indices and writes their observations into shared memory.
+    Only one-byte commands travel over the pipe.
+    """
+    block = shared_memory.SharedMemory(name=shm_name)
+    layout, _ = shared_layout(num_envs, grid_size)
+    arrays = shared_arrays(block.buf, layout)
+    envs = {i: IdeaMazeEnv(**env_kwargs) for i in env_indices}
+    needs_reset = {i: False for i in env_indices}
+
+    try:
+        while True:
+            command = connection.recv_bytes()
+            if command == CLOSE:
+                break
+
+            if command == RESET:
+                for i, env in envs.items():
+                    seed = int(arrays["seed"][i])
+                    env.reset(seed=seed if seed >= 0 else None)
+                    needs_reset[i] = False
+                    write_observation(arrays, i, env.world)
+            elif command == STEP:
+                for i, env in envs.items():
+                    # Games that finished on the last step start over instead of taking the action
+                    if needs_reset[i]:
+                        env.reset()
+                        reward, terminated = 0.0, False
+                    else:
+                        reward = env.world.step(ACTIONS[arrays["action"][i]])
+                        terminated = env.world.done
+                    arrays["reward"][i] = reward
+                    arrays["terminated"][i] = terminated
+                    arrays["won"][i] = env.world.game_won and terminated
+                    needs_reset[i] = terminated
+                    write_observation(arrays, i, env.world)
+
+            connection.send_bytes(command)
+    finally:
+        # Drop the views before closing, shared memory can't close while they exist
+        arrays = None
+        block.close()
+
+
+class SharedMemoryVectorEnv(VectorEnv):
+    """
+    Vector environment whose games run in worker subprocesses, several games
+    per worker. Workers write observations straight into one shared memory
+    block laid out as (num_envs, H, W) int8 plus scalar arrays, and read their
+    actions from a shared buffer, so nothing is pickled on a step. Finished
+    games reset on the next step, like gymnasium's AsyncVectorEnv.
+    """
+    metadata = {"render_modes": [], "autoreset_mode": AutoresetMode.NEXT_STEP}
+
+    def __init__(self, num_envs, num_workers=None, grid_size=GRID_SIZE, runway=STARTING_RUNWAY, **env_kwargs):
+        corpus = env_kwargs.get("corpus")
+        if corpus is not None and not isinstance(corpus, str):
+            # Workers open the corpus themselves so it isn't pickled
+            raise ValueError("Pass the corpus as a path so each worker can memory-map it")
+
+        self.num_envs = num_envs
+        self.num_workers = min(num_workers or os.cpu_count() or 1, num_envs)
+        self.grid_size = grid_size
+        self.render_mode = None
+
+        self.single_action_space = spaces.Discrete(len(ACTIONS))
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self.single_observation_space = make_observation_space(grid_size, runway)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+
+        layout, size = shared_layout(num_envs, grid_size)
+        self.block = shared_memory.SharedMemory(create=True, size=size)
+        self.arrays = shared_arrays(self.block.buf, layout)
+
+        env_kwargs = dict(env_kwargs, grid_size=grid_size, runway=runway)
+        self.connections = []
+        self.processes = []
+        for env_indices in np.array_split(np.arange(num_envs), self.num_workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=worker,
+                args=(child, self.block.name, num_envs, grid_size, env_indices.tolist(), env_kwargs),
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def send_all(self, command):
+        for connection in self.connections:
+            connection.send_bytes(command)
+        for connection in self.connections:
+            connection.recv_bytes()
+
+    def get_observation(self):
+        # Copies, so the caller can keep observations across steps
+        return {"map": self.arrays["map"].copy(), "state": self.arrays["state"].copy()}
+
+    def reset(self, seed=None, options=None):
+        # Seeds follow gymnasium's convention of seed + env index, -1 means unseeded
+        self.arrays["seed"][:] = -1 if seed is None else seed + np.arange(self.num_envs)
+        self.send_all(RESET)
+        return self.get_observation(), {}
+
+    def step(self, actions):
+        self.arrays["action"][:] = actions
+        self.send_all(STEP)
+        terminations = self.arrays["terminated"].copy()
+        truncations = np.zeros(self.num_envs, dtype=bool)
+        return (self.get_observation(), self.arrays["reward"].copy(), terminations, truncations,
+                {"won": self.arrays["won"].copy()})
+
+    def close_extras(self, **kwargs):
+        for connection in self.connections:
+            connection.send_bytes(CLOSE)
+        for process in self.processes:
+            process.join()
+        self.arrays = None
+        self.block.close()
+        self.block.unlink()
@@ -0,0 +1,228 @@
+import os
+import sys
+import math
+import time
+import threading
+import pygame
+from idea_maze import (init_pygame, GRID_SIZE, CELL_SIZE, MARGIN, WINDOW_WIDTH, WINDOW_HEIGHT,
+                       WHITE, BLACK, GREEN, RED)
+
+TILE_MARGIN = 8
+LABEL_HEIGHT = 18
+
+
+def play(player, on_move, stop):
+    """
+    Take moves for one player until its game ends or stop is set.
+    on_move is called after every move.
+    """
+    game = player.game
+    while not stop.is_set() and not (game.game_won or game.game_over):
+        action = player.choose_action(player.get_game_state())
+        player.execute_action(action)
+        on_move()
+        stop.wait(player.move_delay)
+
+
+class SpectatorDashboard:
+    """
+    One window showing many games at once as a grid of thumbnails.
+    Every player moves in its own thread. Tiles are drawn with the games' own
+    draw_maze/draw_founder onto an offscreen surface, scaled down, and only
+    redrawn when their game has moved, at most refresh_rate times a second.
+    Click a tile to watch that game at full size, click again (or Escape) to go back.
+    """
+    def __init__(self, players, columns=None, refresh_rate=4):
+        init_pygame()
+        self.players = players
+        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("The Idea Maze - Spectator")
+        self.clock = pygame.time.Clock()
+        self.font = pygame.font.SysFont(None, 20)
+        self.large_font = pygame.font.SysFont(None, 72)
+        self.refresh_interval = 1 / refresh_rate
+
+        # Grid layout, with square tiles as large as fit in the window
+        count = len(players)
+        self.columns = columns or math.ceil(math.sqrt(count * WINDOW_WIDTH / WINDOW_HEIGHT))
+        self.rows = math.ceil(count / self.columns)
+        self.tile_size = min(
+            (WINDOW_WIDTH - TILE_MARGIN * (self.columns + 1)) // self.columns,
+            (WINDOW_HEIGHT - TILE_MARGIN * (self.rows + 1)) // self.rows - LABEL_HEIGHT,
+        )
+
+        # Full-size surface each game's player view is drawn on before scaling it down
+        view_size = GRID_SIZE * CELL_SIZE
+        self.canvas = pygame.Surface((view_size, view_size + MARGIN))
+        self.view_rect = pygame.Rect(0, MARGIN, view_size, view_size)
+
+        # Moves made in each game, and the move count each thumbnail was drawn at
+        self.versions = [0] * count
+        self.thumbnails = [None] * count
+        self.thumbnail_versions = [None] * count
+
+        self.focused = None
+        self.stop = threading.Event()
+        self.threads = []
+
+    def tile_rect(self, i):
+        row, column = divmod(i, self.columns)
+        x = TILE_MARGIN + column * (self.tile_size + TILE_MARGIN)
+        y = TILE_MARGIN + row * (self.tile_size + TILE_MARGIN + LABEL_HEIGHT)
+        return pygame.Rect(x, y, self.tile_size, self.tile_size + LABEL_HEIGHT)
+
+    def tile_at(self, position):
+        for i in range(len(self.players)):
+            if self.tile_rect(i).collidepoint(position):
+                return i
+        return None
+
+    def draw_game(self, game, surface, callback):
+        """
+        Run callback with the game drawing onto surface instead of its own screen
+        """
+        screen, game.screen = game.screen, surface
+        try:
+            callback()
+        finally:
+            game.screen = screen
+
+    def thumbnail(self, i):
+        """
+        Scaled-down player view of game i, redrawn only if the game moved since the last one
+        """
+        if self.thumbnail_versions[i] != self.versions[i]:
+            # Read the version first, a move finishing while we draw gets drawn next time
+            self.thumbnail_versions[i] = self.versions[i]
+            game = self.players[i].game
+            origin = game.view_origin()
+
+            def draw():
+                self.canvas.fill(WHITE)
+                game.draw_maze(game.player_maze, 0, True, origin)
+                game.draw_founder(0, origin)
+            self.draw_game(game, self.canvas, draw)
+
+            self.thumbnails[i] = pygame.transform.smoothscale(
+                self.canvas.subsurface(self.view_rect), (self.tile_size, self.tile_size))
+        return self.thumbnails[i]
+
+    def draw_grid(self):
+        self.screen.fill(WHITE)
+        for i, player in enumerate(self.players):
+            game = player.game
+            rect = self.tile_rect(i)
+            self.screen.blit(self.thumbnail(i), rect.topleft)
+
+            # Border shows how the game ended
+            color = GREEN if game.game_won else RED if game.game_over else BLACK
+            pygame.draw.rect(self.screen, color, (rect.x, rect.y, self.tile_size, self.tile_size),
+                             3 if color != BLACK else 1)
+
+            label = getattr(player, "player_label", type(player).__name__)
+            text = self.font.render(f"#{i} {label} - {game.runway} mo", True, BLACK)
+            self.screen.blit(text, (rect.x, rect.y + self.tile_size + 2))
+
+    def draw_focused(self):
+        player = self.players[self.focused]
+        game = player.game
+        origin = game.view_origin()
+        label = getattr(player, "player_label", type(player).__name__)
+
+        def draw():
+            self.screen.fill(WHITE)
+            game.draw_maze(game.debug_maze, MARGIN, origin=origin)
+            game.draw_founder(MARGIN, origin)
+            game.draw_maze(game.player_maze, MARGIN * 2 + GRID_SIZE * CELL_SIZE, True, origin)
+            game.draw_founder(MARGIN * 2 + GRID_SIZE * CELL_SIZE, origin)
+            game.draw_runway()
+            game.draw_visibility_indicator()
+        self.draw_game(game, self.screen, draw)
+
+        title = self.font.render(f"Game #{self.focused} - {label} (click or Esc to go back)", True, BLACK)
+        self.screen.blit(title, (WINDOW_WIDTH // 2 - title.get_width() // 2, MARGIN // 2))
+
+        if game.game_won or game.game_over:
+            text = self.large_font.render(f"{label} WINS!" if game.game_won else f"{label} DIED!", True,
+                                          GREEN if game.game_won else RED)
+            self.screen.blit(text, (WINDOW_WIDTH // 2 - text.get_width() // 2,
+                                    WINDOW_HEIGHT - MARGIN - text.get_height()))
+
+    def start(self):
+        """
+        Start a thread playing each game
+        """
+        for i, player in enumerate(self.players):
+            def on_move(i=i):
+                self.versions[i] += 1
+            thread = threading.Thread(target=play, args=(player, on_move, self.stop), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def run(self):
+        self.start()
+        last_refresh = 0.0
+        redraw = True
+        running = True
+
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    self.focused = self.tile_at(event.pos) if self.focused is None else None
+                    redraw = True
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    self.focused = None
+                    redraw = True
+
+            # Redraw at most refresh_rate times a second, or right away after a click
+            now = time.monotonic()
+            if redraw or now - last_refresh >= self.refresh_interval:
+                if self.focused is None:
+                    self.draw_grid()
+                else:
+                    self.draw_focused()
+                pygame.display.flip()
+                last_refresh = now
+                redraw = False
+
+            self.clock.tick(30)
+
+        self.stop.set()
+        pygame.quit()
+        sys.exit()
+
+
+def make_players(player_type, count):
+    """
+    count players made by ai_player.make_player. MCTS players share one pool of
+    worker processes, one per CPU, and split it between them unless MCTS_WORKERS is set.
+    """
+    from ai_player import make_player
+    options = {}
+    if player_type == "mcts":
+        from concurrent.futures import ProcessPoolExecutor
+        cpus = os.cpu_count() or 1
+        options["pool"] = ProcessPoolExecutor(max_workers=cpus)
+        if not os.environ.get("MCTS_WORKERS"):
+            options["num_workers"] = max(cpus // count, 1)
+    return [make_player(player_type, **options) for _ in range(count)]
+
+
+if __name__ == "__main__":
+    # python spectator.py [number of games], with PLAYER_TYPE and MOVE_DELAY as for ai_player.py
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    player_type = os.environ.get("PLAYER_TYPE", "dumb").lower()
+    players = make_players(player_type, count)
+    # OpenAI players share one rate limit, set with RATE_LIMIT_RPM and RATE_LIMIT_TPM
+    if os.environ.get("RATE_LIMIT_RPM") or os.environ.get("RATE_LIMIT_TPM"):
+        from rate_limit import RateLimitScheduler
+        scheduler = RateLimitScheduler.from_env()
+        for player in players:
+            if hasattr(player, "share_rate_limit"):
+                player.share_rate_limit(scheduler)
+    if os.environ.get("MOVE_DELAY"):
+        for player in players:
+            player.move_delay = float(os.environ["MOVE_DELAY"])
+    SpectatorDashboard(players).run()
@@ -0,0 +1,23 @@
+import os
+import sys
+import pytest
+
+# The modules live at the top of the repository, and games must not open a window
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+
+class FakeClock:
+    """
+    A clock for the clock= arguments that only moves when now is set
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
@@ -0,0 +1,185 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from ai_player import AIPlayer
+from circuit_breaker import CircuitBreaker
+from llm_backends import LLMBackend
+
+
+class ScriptedBackend(LLMBackend):
+    """
+    Replies with (reply, seconds) from script in the order requests arrive,
+    cycling through it; a reply that is an exception is raised instead.
+    Counts the requests cancelled before their reply was ready.
+    """
+    model = "stub"
+
+    def __init__(self, script):
+        self.script = script
+        self.calls = 0
+        self.cancelled = 0
+
+    def next_reply(self):
+        reply, delay = self.script[self.calls % len(self.script)]
+        self.calls += 1
+        return reply, delay
+
+    @staticmethod
+    def response(reply):
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=reply))], usage=None)
+
+    def create(self, **request):
+        reply, delay = self.next_reply()
+        time.sleep(delay)
+        return self.response(reply)
+
+    async def acreate(self, **request):
+        reply, delay = self.next_reply()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.response(reply)
+
+
+def make_player(script, **options):
+    random.seed(0)
+    backend = ScriptedBackend(script)
+    player = AIPlayer(structured_output=False, macro_actions=False, backend=backend, **options)
+    return player, backend
+
+
+def decide(player):
+    action = player.choose_action(player.get_game_state())
+    player.execute_action(action)
+    return action
+
+
+def test_quorum_cancels_slow_requests():
+    player, backend = make_player([("build", 0.01), ("build", 0.02), ("pivot", 2.0)], ensemble=3)
+    start = time.perf_counter()
+    assert decide(player) == "build"
+    assert time.perf_counter() - start < 1.0
+    player.close()
+
+    assert backend.cancelled == 1
+    stats = player.ensemble_stats
+    assert (stats["requests"], stats["replies"], stats["abandoned"]) == (3, 2, 1)
+    assert (stats["quorum_reached"], stats["unanimous"], stats["winning_votes"]) == (1, 1, 2)
+
+
+def test_tie_goes_to_first_reply():
+    player, backend = make_player([("pivot", 0.06), ("build", 0.02), ("talk_to_user", 0.04)], ensemble=3)
+    assert decide(player) == "build"
+    player.close()
+
+    stats = player.ensemble_stats
+    assert (stats["replies"], stats["quorum_reached"], stats["unanimous"], stats["winning_votes"]) == (3, 0, 0, 1)
+
+
+def test_failed_requests_dont_vote():
+    error = ConnectionError("reset")
+    player, backend = make_player([(error, 0.0), ("pivot", 0.02), ("pivot", 0.03)], ensemble=3)
+    assert decide(player) == "pivot"
+    player.close()
+
+    stats = player.ensemble_stats
+    assert (stats["failed"], stats["replies"], stats["quorum_reached"]) == (1, 2, 1)
+    assert player.response_stats["errors"] == 0
+
+
+def test_replies_after_the_quorum_are_unused():
+    # All three replies are ready together, but the vote is decided by the first two
+    player, backend = make_player([("build", 0.0)], ensemble=3)
+    assert decide(player) == "build"
+    player.close()
+
+    stats = player.ensemble_stats
+    assert (stats["requests"], stats["replies"], stats["unused"], stats["abandoned"]) == (3, 2, 1, 0)
+
+
+def test_every_request_is_accounted_for():
+    error = ConnectionError("reset")
+    script = [("build", 0.0), ("pivot", 0.0), ("build", 0.001), (error, 0.0), ("talk_to_user", 0.002),
+              ("build", 0.0), ("fundraise", 0.05)]
+    player, backend = make_player(script, ensemble=3)
+    for _ in range(30):
+        if player.game.game_won or player.game.game_over:
+            break
+        decide(player)
+    player.close()
+
+    stats = player.ensemble_stats
+    assert stats["decisions"] == len(player.action_history)
+    assert stats["requests"] == 3 * stats["decisions"] == backend.calls
+    assert stats["requests"] == stats["replies"] + stats["failed"] + stats["unused"] + stats["abandoned"]
+    assert stats["abandoned"] == backend.cancelled
+
+
+def test_prefetch_hits_predicted_state():
+    player, backend = make_player([("talk_to_user", 0.01)], prefetch=True)
+    for _ in range(6):
+        assert decide(player) == "talk_to_user"
+    player.close()
+
+    # Every decision after the first was sent while the previous action played
+    assert player.prefetch_stats == {"requests": 6, "hits": 5, "misses": 0, "over_limit": 0}
+    assert backend.calls == 7
+    # The last prediction was still in flight when the player closed
+    assert backend.cancelled == 1
+
+
+def test_pivot_prefetches_every_direction():
+    player, backend = make_player([("pivot", 0.05)], prefetch=True)
+    for _ in range(6):
+        decide(player)
+    player.close()
+
+    assert player.prefetch_stats == {"requests": 18, "hits": 5, "misses": 0, "over_limit": 0}
+    # The two directions not taken are cancelled in flight
+    assert backend.cancelled == 18 - 5
+
+
+def test_prefetch_limit():
+    player, backend = make_player([("pivot", 0.05)], prefetch=True, prefetch_limit=1)
+    for _ in range(6):
+        decide(player)
+        assert len(player.prefetched) == 1
+    player.close()
+
+    stats = player.prefetch_stats
+    assert (stats["requests"], stats["over_limit"]) == (6, 12)
+    assert stats["hits"] + stats["misses"] == 5
+
+
+def test_discarded_predictions_are_not_counted():
+    player, backend = make_player([("pivot", 0.05)], prefetch=True, ensemble=3)
+    for _ in range(6):
+        decide(player)
+    player.close()
+
+    # One ensemble is prefetched per move, but only the votes behind played moves count
+    assert player.prefetch_stats["requests"] == 6
+    assert backend.calls > 18
+    stats = player.ensemble_stats
+    assert (stats["decisions"], stats["requests"]) == (6, 18)
+    assert stats["requests"] == stats["replies"] + stats["failed"] + stats["unused"] + stats["abandoned"]
+
+
+def test_stale_prediction_is_cancelled(clock):
+    player, backend = make_player([("talk_to_user", 0.5)], prefetch=True)
+    player.set_circuit_breaker(CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock), "random")
+    decide(player)
+    assert len(player.prefetched) == 1
+
+    # The API goes down before the predicted state is asked about
+    player.breaker.record_failure()
+    decide(player)
+    assert player.prefetched == []
+    assert player.prefetch_stats["misses"] == 1
+    player.close()
+    assert backend.cancelled == 1
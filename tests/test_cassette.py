@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from cassette import Cassette, CassetteBackend, CassetteMiss, request_key
+from llm_backends import LLMBackend, StubBackend
+
+
+class Unreachable(LLMBackend):
+    model = "stub"
+
+    def create(self, **request):
+        raise AssertionError("replayed requests must not reach the backend")
+
+
+def make_request(content="map", **options):
+    return dict({"model": "stub", "messages": [{"role": "user", "content": content}],
+                 "temperature": 0.2, "max_tokens": 10}, **options)
+
+
+def content(response):
+    return response.choices[0].message.content
+
+
+def test_request_key():
+    request = make_request()
+    assert request_key(request) == request_key(dict(reversed(list(request.items()))))
+    assert request_key(request) != request_key(make_request("other map"))
+    assert request_key(request) != request_key(make_request(model="other model"))
+    assert request_key(request) != request_key(make_request(temperature=0.8))
+    assert request_key(request) != request_key(make_request(seed=1))
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = CassetteBackend(StubBackend(policy=["build", "pivot", "fundraise"]), Cassette(path, "record"))
+    recorded = [content(recorder.create(**make_request())) for _ in range(2)]
+    recorded.append(content(recorder.create(**make_request("other map"))))
+    assert recorded == ["build", "pivot", "fundraise"]
+    assert recorder.cassette.stats["recorded"] == 3
+
+    cassette = Cassette(path, "replay")
+    player = CassetteBackend(Unreachable(), cassette)
+    # Repeated requests replay in recorded order, then repeat the last response
+    assert [content(player.create(**make_request())) for _ in range(3)] == ["build", "pivot", "pivot"]
+    response = player.create(**make_request("other map"))
+    assert content(response) == "fundraise"
+    assert response.usage.total_tokens > 0
+    assert cassette.stats == {"hits": 4, "misses": 0, "recorded": 0}
+
+
+def test_replay_miss_raises(tmp_path):
+    player = CassetteBackend(Unreachable(), Cassette(str(tmp_path / "cassette.jsonl"), "replay"))
+    with pytest.raises(CassetteMiss):
+        player.create(**make_request())
+
+
+def test_auto_records_only_what_is_missing(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    CassetteBackend(StubBackend(policy=["build"]), Cassette(path, "record")).create(**make_request())
+
+    stub = StubBackend(policy=["talk_to_user"])
+    cassette = Cassette(path, "auto")
+    player = CassetteBackend(stub, cassette)
+    assert content(player.create(**make_request())) == "build"
+    # Asked again: more often than recorded, so a new response is recorded
+    assert content(player.create(**make_request())) == "talk_to_user"
+    assert stub.calls == 1
+    assert cassette.stats == {"hits": 1, "misses": 1, "recorded": 1}
+    assert len(Cassette(path, "replay").entries[request_key(make_request())]) == 2
+
+
+def test_async_round_trip(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = CassetteBackend(StubBackend(policy=["build"]), Cassette(path, "record"))
+    assert content(asyncio.run(recorder.acreate(**make_request()))) == "build"
+
+    player = CassetteBackend(Unreachable(), Cassette(path, "replay"))
+    assert content(asyncio.run(player.acreate(**make_request()))) == "build"
+
+
+def test_unknown_mode(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "cassette.jsonl"), "rewind")
@@ -0,0 +1,90 @@
+from ai_player import AIPlayer
+from circuit_breaker import CircuitBreaker
+from llm_backends import StubBackend
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_failures_in_a_row(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    # A success resets the count
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats == {"trips": 1, "probes": 0, "recoveries": 0, "refused": 1}
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    trip(breaker)
+
+    clock.now = 9.9
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 10.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.stats["probes"] == 1
+
+
+def test_successful_probe_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    trip(breaker)
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    assert breaker.stats["recoveries"] == 1
+    # It takes the full threshold to trip again
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_for_another_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    trip(breaker)
+    clock.now = 15.0
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 24.9
+    assert not breaker.allow()
+    clock.now = 25.0
+    assert breaker.allow()
+    # Reopening is still the same trip
+    assert breaker.stats["trips"] == 1
+    assert breaker.stats["probes"] == 2
+
+
+def test_player_falls_back_while_open(clock):
+    calls = []
+
+    def down(request):
+        calls.append(request)
+        raise ConnectionError("API is down")
+
+    player = AIPlayer(backend=StubBackend(policy=down))
+    player.set_circuit_breaker(CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock), "random")
+    for _ in range(5):
+        assert player.choose_action(player.get_game_state()) in player.actions
+    assert len(calls) == 2
+    assert player.degraded_steps == 3
+
+    # The probe gets through once the timeout is over, and closes the breaker if it works
+    player.backend = StubBackend(policy=["build"])
+    clock.now = 10.0
+    assert player.choose_action(player.get_game_state()) == "build"
+    assert player.breaker.state == CircuitBreaker.CLOSED
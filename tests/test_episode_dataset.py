@@ -0,0 +1,29 @@
+import numpy as np
+from episode_dataset import TransitionWriter, read_shards
+
+
+def write_episode(writer, steps, episode=None):
+    for step in range(steps):
+        observation = np.full((4, 4), step % 3 - 1)
+        writer.add(observation, "build", 12 - step, (step % 4, 0), 1, 0, float(step == steps - 1),
+                   step == steps - 1, episode)
+
+
+def test_round_trip(tmp_path):
+    writer = TransitionWriter(str(tmp_path), shard_size=4)
+    write_episode(writer, 6)
+    write_episode(writer, 3, episode=7)
+    writer.close()
+    # Closing writes the last shard without starting another
+    assert writer.buffers is None
+
+    shards = list(read_shards(str(tmp_path)))
+    assert [len(shard["action"]) for shard in shards] == [4, 4, 1]
+    columns = {name: np.concatenate([shard[name] for shard in shards]) for name in shards[0]}
+    assert columns["step"].tolist() == [0, 1, 2, 3, 4, 5, 0, 1, 2]
+    assert columns["episode"][6:].tolist() == [7, 7, 7]
+    assert len(set(columns["episode"][:6].tolist())) == 1
+    assert columns["done"].tolist() == [False] * 5 + [True] + [False] * 2 + [True]
+    assert columns["observation"].shape == (9, 4, 4)
+    assert columns["observation"][4].tolist() == np.full((4, 4), 0).tolist()
+    assert writer.transitions_written == 9
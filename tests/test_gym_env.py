@@ -0,0 +1,32 @@
+import gymnasium
+import numpy as np
+from gymnasium.utils.env_checker import check_env
+from gym_env import IdeaMazeEnv
+
+
+def test_check_env():
+    check_env(IdeaMazeEnv(), skip_render_check=True)
+
+
+def test_check_registered_env():
+    # Made through the registry so the checker also tries the other render modes
+    check_env(gymnasium.make("IdeaMaze-v0", render_mode="rgb_array").unwrapped)
+
+
+def test_seeded_episodes_match():
+    episodes = []
+    for _ in range(2):
+        env = IdeaMazeEnv()
+        env.action_space.seed(3)
+        observation, _ = env.reset(seed=7)
+        observations = [observation]
+        done = False
+        while not done:
+            observation, reward, done, truncated, info = env.step(env.action_space.sample())
+            observations.append(observation)
+        episodes.append(observations)
+
+    assert len(episodes[0]) == len(episodes[1])
+    for first, second in zip(*episodes):
+        assert np.array_equal(first["map"], second["map"])
+        assert np.array_equal(first["state"], second["state"])
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from headless_maze import ACTIONS
+from mcts_search import search
+
+
+def test_import_does_not_load_pygame():
+    # Search workers started with spawn or forkserver import this module
+    code = "import sys, mcts_search; print('pygame' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "False"
+
+
+def test_search_spends_iteration_budget():
+    visible_map = np.full((5, 5), -1, dtype=np.int8)
+    visible_map[1:4, 1:4] = 0
+    visited_cells = visible_map != -1
+    observation = {"visible_map": visible_map, "visited_cells": visited_cells, "founder_position": (2, 2),
+                   "direction": 0, "runway": 12, "temporary_boost": 0}
+    visits, value_sums, rollouts = search(observation, iteration_budget=200, seed=1)
+    assert rollouts == 200
+    assert len(visits) == len(value_sums) == len(ACTIONS)
+    # Fundraise is never searched, and the root is expanded once per iteration
+    assert visits[ACTIONS.index("fundraise")] == 0
+    assert sum(visits) == rollouts
+    assert search(observation, iteration_budget=200, seed=1) == (visits, value_sums, rollouts)
@@ -0,0 +1,65 @@
+import json
+import random
+from types import SimpleNamespace
+from circuit_breaker import CircuitBreaker
+from llm_backends import LLMBackend
+from planning_player import PlanningAIPlayer
+
+
+class PlanBackend(LLMBackend):
+    """
+    Replies with the same three-action plan every time
+    """
+    model = "stub"
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **request):
+        self.calls += 1
+        content = json.dumps({"plan": ["build", "build", "talk_to_user"]})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def play(player, steps=60):
+    for _ in range(steps):
+        if player.game.game_won or player.game.game_over:
+            break
+        player.execute_action(player.choose_action(player.get_game_state()))
+
+
+def test_replans_count_model_requests_only_with_router():
+    random.seed(5)
+    backend = PlanBackend()
+    player = PlanningAIPlayer(router=True, macro_actions=False, backend=backend)
+    play(player, steps=100)
+
+    stats = player.plan_stats
+    routed = sum(player.router_stats.values()) - player.router_stats["escalated"]
+    assert routed > 0
+    assert stats["cached_actions"] > 0
+    assert sum(stats["replans"].values()) == stats["requests"] == backend.calls
+    assert len(player.action_history) == stats["cached_actions"] + routed + backend.calls
+
+
+def test_fallback_moves_are_not_replans(clock):
+    random.seed(3)
+    backend = PlanBackend()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    player = PlanningAIPlayer(macro_actions=False, backend=backend)
+    player.set_circuit_breaker(breaker, "random")
+    # One request, then the plan's other two actions
+    play(player, steps=3)
+    assert backend.calls == 1
+
+    # The API goes down: the fallback plays without ending more plans
+    breaker.record_failure()
+    play(player, steps=5)
+    assert player.degraded_steps == 5
+    assert player.plan_stats["replans"]["exhausted"] == 1
+
+    # The probe asks for the new plan, counted once
+    clock.now = 10.0
+    play(player, steps=1)
+    assert backend.calls == 2
+    assert player.plan_stats["replans"] == {"exhausted": 2, "pivot": 0, "wall": 0, "pmf": 0}
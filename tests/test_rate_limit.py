@@ -0,0 +1,122 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from rate_limit import RateLimitScheduler, TokenBucket
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("429")
+        self.response = SimpleNamespace(headers={"retry-after": str(retry_after)})
+
+
+def test_bucket_refills_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=10, clock=clock)
+    bucket.take(10)
+    assert bucket.wait_time(4) == pytest.approx(2.0)
+
+    clock.now = 1.0
+    assert bucket.wait_time(4) == pytest.approx(1.0)
+    assert bucket.level == pytest.approx(2.0)
+
+    clock.now = 100.0
+    assert bucket.wait_time(4) == 0
+    assert bucket.level == 10
+
+
+def test_bucket_over_capacity_waits_for_full_bucket(clock):
+    bucket = TokenBucket(rate=1, capacity=10, clock=clock)
+    bucket.take(5)
+    assert bucket.wait_time(50) == pytest.approx(5.0)
+    # Taking it anyway leaves the bucket in debt
+    bucket.take(50)
+    assert bucket.wait_time(1) == pytest.approx(46.0)
+
+
+def test_bucket_gives_back_units(clock):
+    bucket = TokenBucket(rate=1, capacity=10, clock=clock)
+    bucket.take(8)
+    bucket.take(-3)
+    assert bucket.level == pytest.approx(5.0)
+    bucket.take(-30)
+    assert bucket.level == 10
+
+
+def test_usage_corrects_token_bucket(clock):
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=600, clock=clock)
+    response, waited = scheduler.call("game", lambda: SimpleNamespace(usage=SimpleNamespace(total_tokens=250)),
+                                      tokens=100)
+    assert waited == 0
+    assert scheduler.tokens.level == pytest.approx(350)
+    assert scheduler.requests.level == pytest.approx(59)
+    assert scheduler.stats["requests"] == 1
+    assert scheduler.stats["tokens"] == 250
+
+
+def test_pause_holds_every_game():
+    scheduler = RateLimitScheduler()
+    scheduler.pause(0, 0.2)
+    assert scheduler.acquire("game", 1) >= 0.19
+    # Once the pause is over requests go straight through
+    assert scheduler.acquire("other game", 1) < 0.05
+
+
+def test_call_retries_after_rate_limit():
+    scheduler = RateLimitScheduler(backoff=0.01)
+    replies = [RateLimited(0.1), "reply"]
+
+    def send():
+        reply = replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    response, waited = scheduler.call("game", send)
+    assert response == "reply"
+    assert waited >= 0.09
+    assert scheduler.stats["throttled"] == 1
+    assert scheduler.stats["backoff_seconds"] == pytest.approx(0.1)
+
+
+def test_call_raises_other_errors_and_gives_up():
+    scheduler = RateLimitScheduler(max_retries=2, backoff=0.001)
+
+    def broken():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call("game", broken)
+    assert scheduler.stats["failed"] == 1
+
+    def limited():
+        raise RateLimited(0)
+
+    with pytest.raises(RateLimited):
+        scheduler.call("game", limited)
+    assert scheduler.stats["throttled"] == 2
+    assert scheduler.stats["failed"] == 2
+
+
+def test_cancelled_acquire_leaves_queue():
+    scheduler = RateLimitScheduler(requests_per_minute=60)
+    scheduler.acquire("game", 1)
+    scheduler.requests.take(60)
+
+    # Waits for the empty bucket until cancelled, without taking a request
+    cancelled = threading.Event()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(scheduler.acquire("other game", 1, cancelled)))
+    thread.start()
+    time.sleep(0.05)
+    assert "other game" in scheduler.waiting
+    cancelled.set()
+    with scheduler.condition:
+        scheduler.condition.notify_all()
+    thread.join(1)
+
+    assert result == [None]
+    assert scheduler.waiting == {}
+    assert scheduler.stats["per_game"].keys() == {"game"}
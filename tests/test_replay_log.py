@@ -0,0 +1,68 @@
+import os
+import random
+import numpy as np
+from maze_core import generate_maze
+from headless_maze import ACTIONS, HeadlessMaze
+from replay_log import INDEX_SUFFIX, ReplayArchive, ReplayWriter
+
+
+def record_game(path, seed, steps=100, **kwargs):
+    """
+    Play random actions in a new game, recording them to the archive at path.
+    Returns the founder state after every step, starting with the initial one.
+    """
+    rng = random.Random(seed)
+    maze, pmf_pos, founder_pos = generate_maze(rng)
+    sim = HeadlessMaze(maze, founder_pos, pmf_pos, rng.randrange(4), rng=rng)
+    writer = ReplayWriter(path, maze, founder_pos, pmf_pos, sim.direction, sim.runway, seed=seed, **kwargs)
+    states = [(sim.x, sim.y, sim.direction, sim.temporary_boost, sim.runway)]
+    actions = []
+    while not sim.done and len(actions) < steps:
+        action = rng.choice(ACTIONS)
+        sim.step(action)
+        writer.record(action, sim, latency=0.5)
+        actions.append(action)
+        states.append((sim.x, sim.y, sim.direction, sim.temporary_boost, sim.runway))
+    writer.close()
+    return maze, actions, states
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "games.pmfr")
+    games = [record_game(path, seed, keyframe_interval=8, record_latency=True) for seed in range(5)]
+
+    archive = ReplayArchive(path)
+    assert len(archive) == len(games)
+    for episode, (maze, actions, states) in enumerate(games):
+        replay = archive[episode]
+        assert replay.seed == episode
+        assert np.array_equal(replay.maze, maze)
+        assert replay.num_steps == len(actions)
+        assert [replay.action(step) for step in range(replay.num_steps)] == actions
+        assert np.allclose(replay.latencies, 0.5)
+        # Every step, including ones far from a keyframe
+        for step, (x, y, direction, boost, runway) in enumerate(states):
+            state = replay.state_at(step)
+            assert (state["x"], state["y"], state["direction"], state["temporary_boost"], state["runway"]) \
+                == (x, y, direction, boost, runway)
+
+
+def test_rebuilt_index_matches(tmp_path):
+    path = str(tmp_path / "games.pmfr")
+    for seed in range(4):
+        record_game(path, seed)
+    offsets = ReplayArchive(path).offsets.tolist()
+
+    os.remove(path + INDEX_SUFFIX)
+    assert ReplayArchive(path).offsets.tolist() == offsets
+    # Rebuilding writes the index again
+    assert os.path.exists(path + INDEX_SUFFIX)
+
+
+def test_closing_twice_appends_once(tmp_path):
+    path = str(tmp_path / "games.pmfr")
+    maze, pmf_pos, founder_pos = generate_maze(random.Random(0))
+    writer = ReplayWriter(path, maze, founder_pos, pmf_pos, 0, 12)
+    writer.close()
+    writer.close()
+    assert len(ReplayArchive(path)) == 1
@@ -0,0 +1,204 @@
+import os
+import struct
+import shutil
+import subprocess
+import zlib
+import numpy as np
+from rgb_render import RENDER_CELL_SIZE, render_game
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# White gap between the debug and player views, in pixels
+VIEW_GAP = 8
+
+
+def png_chunk(chunk_type, data):
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+
+def png_image_data(frame, compression=6):
+    """
+    Compressed PNG image data for an (H, W, 3) uint8 frame, every row using filter type 0
+    """
+    height, width = frame.shape[:2]
+    rows = np.empty((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 0] = 0
+    rows[:, 1:] = frame.reshape(height, width * 3)
+    return zlib.compress(rows.tobytes(), compression)
+
+
+def encode_png(frame, compression=9):
+    """
+    (H, W, 3) uint8 frame as PNG file bytes
+    """
+    height, width = frame.shape[:2]
+    return (PNG_SIGNATURE
+            + png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + png_chunk(b"IDAT", png_image_data(frame, compression))
+            + png_chunk(b"IEND", b""))
+
+
+class APNGWriter:
+    """
+    Streams RGB frames into an animated PNG, compressing and writing each frame
+    as it arrives. The frame count in the header is filled in on close, so
+    memory use doesn't grow with the length of the video. Needs no extra packages.
+    """
+    def __init__(self, path, fps=4, loop=True, compression=6):
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.compression = compression
+        self.file = None
+        self.size = None
+        self.frames = 0
+        self.sequence = 0
+
+    def start(self, width, height):
+        self.size = (width, height)
+        self.file = open(self.path, "wb")
+        self.file.write(PNG_SIGNATURE)
+        self.file.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        # Animation control: frame count (patched on close) and number of plays (0 = forever)
+        self.actl_offset = self.file.tell()
+        self.file.write(png_chunk(b"acTL", struct.pack(">II", 0, 0 if self.loop else 1)))
+
+    def write(self, frame):
+        height, width = frame.shape[:2]
+        if self.file is None:
+            self.start(width, height)
+        elif (width, height) != self.size:
+            raise ValueError(f"Frame is {width}x{height}, the video is {self.size[0]}x{self.size[1]}")
+
+        data = png_image_data(frame, self.compression)
+
+        self.file.write(png_chunk(b"fcTL", struct.pack(
+            ">IIIIIHHBB", self.sequence, width, height, 0, 0, 1, self.fps, 0, 0)))
+        self.sequence += 1
+        if self.frames == 0:
+            # The first frame is the default image, shown by viewers without APNG support
+            self.file.write(png_chunk(b"IDAT", data))
+        else:
+            self.file.write(png_chunk(b"fdAT", struct.pack(">I", self.sequence) + data))
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.write(png_chunk(b"IEND", b""))
+        self.file.seek(self.actl_offset)
+        self.file.write(png_chunk(b"acTL", struct.pack(">II", self.frames, 0 if self.loop else 1)))
+        self.file.close()
+        self.file = None
+
+
+class FFmpegWriter:
+    """
+    Streams RGB frames into an ffmpeg subprocess through a pipe, so any format
+    ffmpeg can write (mp4, webm, gif, ...) works without holding frames in memory
+    """
+    def __init__(self, path, fps=4, ffmpeg="ffmpeg", extra_args=()):
+        if shutil.which(ffmpeg) is None:
+            raise RuntimeError(f"{ffmpeg} not found; install it or record to a .png file instead")
+        self.path = path
+        self.fps = fps
+        self.ffmpeg = ffmpeg
+        self.extra_args = list(extra_args)
+        self.process = None
+        self.size = None
+        self.frames = 0
+
+    def start(self, width, height):
+        self.size = (width, height)
+        command = [
+            self.ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+        ]
+        if not self.path.endswith(".gif"):
+            # Most codecs need even dimensions and yuv420p for players to accept the file
+            command += ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p"]
+        self.process = subprocess.Popen(command + self.extra_args + [self.path], stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        height, width = frame.shape[:2]
+        if self.process is None:
+            self.start(width, height)
+        elif (width, height) != self.size:
+            raise ValueError(f"Frame is {width}x{height}, the video is {self.size[0]}x{self.size[1]}")
+        self.process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+        self.frames += 1
+
+    def close(self):
+        if self.process is None:
+            return
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.path}")
+        self.process = None
+
+
+def open_writer(path, fps=4):
+    """
+    APNGWriter for .png/.apng paths, otherwise an FFmpegWriter
+    """
+    if os.path.splitext(path)[1].lower() in (".png", ".apng"):
+        return APNGWriter(path, fps)
+    return FFmpegWriter(path, fps)
+
+
+def compose_frame(game, cell_size=RENDER_CELL_SIZE, debug_view=True):
+    """
+    Player view of an IdeaMaze or HeadlessMaze, with the debug view to its left if debug_view is set
+    """
+    player = render_game(game, cell_size)
+    if not debug_view:
+        return player
+    debug = render_game(game, cell_size, debug=True)
+    gap = np.full((player.shape[0], VIEW_GAP, 3), 255, dtype=np.uint8)
+    return np.concatenate([debug, gap, player], axis=1)
+
+
+class VideoRecorder:
+    """
+    Records a game to a video file, one frame per step. With frame_skip=n only
+    every nth step is written (the final step always is), and the writer
+    encodes frames as they come, so memory use stays the same for any game length.
+    """
+    def __init__(self, path, fps=4, frame_skip=1, cell_size=RENDER_CELL_SIZE, debug_view=True):
+        self.writer = open_writer(path, fps)
+        self.frame_skip = frame_skip
+        self.cell_size = cell_size
+        self.debug_view = debug_view
+        self.steps = 0
+        self.last_written = None
+
+    def capture(self, game):
+        """
+        Call once per step, including once before the first action
+        """
+        if self.steps % self.frame_skip == 0:
+            self.writer.write(compose_frame(game, self.cell_size, self.debug_view))
+            self.last_written = self.steps
+        self.steps += 1
+
+    def close(self, game=None):
+        """
+        Finish the video, writing the game's final state if it was skipped
+        """
+        if game is not None and self.steps and self.last_written != self.steps - 1:
+            self.writer.write(compose_frame(game, self.cell_size, self.debug_view))
+        self.writer.close()
+
+
+def record_episode(world, policy, path, **kwargs):
+    """
+    Play a HeadlessMaze to the end with policy(world) -> action and record it to path
+    """
+    recorder = VideoRecorder(path, **kwargs)
+    recorder.capture(world)
+    while not world.done:
+        world.step(policy(world))
+        recorder.capture(world)
+    recorder.close(world)
+    return recorder
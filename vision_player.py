@@ -0,0 +1,108 @@
+import base64
+import hashlib
+from collections import OrderedDict
+import numpy as np
+from ai_player import AIPlayer
+from rgb_render import render_game
+from video_export import encode_png
+
+# Pixels per cell in images sent to the model (half the size of recorded videos)
+IMAGE_CELL_SIZE = 8
+# Encoded images kept, by observation hash
+IMAGE_CACHE_SIZE = 256
+
+
+class VisionAIPlayer(AIPlayer):
+    """
+    AIPlayer that shows the model the rendered player view as an image
+    instead of the ASCII map, to compare text and image observations.
+    Images are rendered small, PNG-encoded once per distinct view and cached
+    by a hash of the view. While the view is unchanged the previous image
+    message is resent as-is, followed by the new game state as text, so the
+    request starts with the same prefix and can be served from the API's
+    prompt cache instead of re-processing a new image.
+    """
+    # Each request depends on the rendered view, which isn't predicted
+    can_prefetch = False
+
+    def __init__(self, layout=None, cell_size=IMAGE_CELL_SIZE, detail="low", cache_size=IMAGE_CACHE_SIZE,
+                 macro_actions=True, structured_output=True, router=False, **options):
+        super().__init__(layout, macro_actions, structured_output, router, **options)
+        self.cell_size = cell_size
+        self.detail = detail
+        self.cache_size = cache_size
+
+        # Observation hash -> PNG data URL, least recently used first
+        self.image_cache = OrderedDict()
+        # Last message that carried an image, the view it showed and the model's reply to it
+        self.image_message = None
+        self.image_hash = None
+        self.image_reply = None
+        self.image_stats = {"encoded": 0, "cache_hits": 0, "unchanged": 0, "bytes_encoded": 0}
+
+        self.player_label = "OpenAI Vision Player"
+
+    def observation_hash(self):
+        """
+        Hash of everything the image shows: the fog-masked map and the founder's position and direction
+        """
+        founder = self.game.founder
+        digest = hashlib.blake2b(self.get_visible_array().tobytes(), digest_size=16)
+        digest.update(np.array([founder.x, founder.y, founder.direction.value], dtype=np.int32).tobytes())
+        return digest.digest()
+
+    def image_url(self, key):
+        """
+        The current view as a PNG data URL, encoded only if this view isn't cached
+        """
+        url = self.image_cache.get(key)
+        if url is not None:
+            self.image_cache.move_to_end(key)
+            self.image_stats["cache_hits"] += 1
+            return url
+
+        png = encode_png(render_game(self.game, self.cell_size))
+        url = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+        self.image_stats["encoded"] += 1
+        self.image_stats["bytes_encoded"] += len(png)
+
+        self.image_cache[key] = url
+        if len(self.image_cache) > self.cache_size:
+            self.image_cache.popitem(last=False)
+        return url
+
+    def describe_map(self, game_state):
+        return ("Visible Map: see the attached image of the player view. Gray cells are unexplored, "
+                "white cells are empty, black cells are walls and the blue cell is PMF. The Founder is "
+                "the red square, with a black line pointing in the direction it faces. The top left "
+                "cell is (0, 0), x grows to the right and y grows downwards.")
+
+    def build_messages(self, game_state, action_history=None):
+        # action_history is ignored: the image always shows the game's current view
+        key = self.observation_hash()
+        text = self.user_prompt(game_state)
+
+        if key == self.image_hash and self.image_message is not None:
+            # Same view as the last image: repeat that exchange unchanged and add the new state as text
+            self.image_stats["unchanged"] += 1
+            return [
+                {"role": "system", "content": self.system_prompt()},
+                self.image_message,
+                {"role": "assistant", "content": self.image_reply or ""},
+                {"role": "user", "content": "The view is the same as in the last image.\n" + text},
+            ]
+
+        self.image_hash = key
+        self.image_reply = None
+        self.image_message = {"role": "user", "content": [
+            {"type": "text", "text": text},
+            {"type": "image_url", "image_url": {"url": self.image_url(key), "detail": self.detail}},
+        ]}
+        return [{"role": "system", "content": self.system_prompt()}, self.image_message]
+
+    def fetch_reply(self, messages):
+        reply, queued = super().fetch_reply(messages)
+        # Remember the reply to a new image, to replay that exchange while the view doesn't change
+        if messages[-1] is self.image_message:
+            self.image_reply = reply
+        return reply, queued